@@ -1,11 +1,26 @@
 import os
+import asyncio
+import logging
+import logging.handlers
+import queue
+import signal
+import threading
 import time
-import traceback
 import random
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from tenacity import (
+    Retrying,
+    retry_if_exception,
+    retry_if_result,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 
 from config import get_db, POLL_INTERVAL_SECONDS
-from models import create_market_price_doc
+from models import create_market_price_doc, stamp_market_price_doc
 from polymarket import PolymarketClient
 from kalshi import KalshiClient
 from arbitrage import find_arbitrage_opportunities, store_arbitrage_opportunities
@@ -16,6 +31,47 @@ from position_manager import PositionManager
 # -------------------------------
 DEMO_MODE = os.getenv("DEMO_MODE", "true").lower() == "true"
 
+log = logging.getLogger("agent")
+
+DUPLICATE_KEY_ERROR = 11000
+
+_UTC = timezone.utc
+
+# Deterministic demo prices (guaranteed arbitrage)
+DEMO_PRICES = {
+    "polymarket": [
+        {
+            "market_id": "PM_LAKERS_WIN",
+            "event_name": "Lakers vs Celtics",
+            "yes_price": 0.58,
+            "no_price": 0.44,
+        }
+    ],
+    "kalshi": [
+        {
+            "market_id": "KALSHI_LAKERS_WIN",
+            "event_name": "Lakers vs Celtics",
+            "yes_price": 0.47,
+            "no_price": 0.53,
+        }
+    ],
+}
+
+# The demo snapshot never changes, so build its docs once and only
+# stamp the time fields per iteration
+_DEMO_PRICE_DOCS = tuple(
+    {
+        "market_id": pd["market_id"],
+        "platform": platform,
+        "event_name": pd["event_name"],
+        "outcome": outcome,
+        "price": pd[f"{outcome}_price"],
+    }
+    for platform, prices in DEMO_PRICES.items()
+    for pd in prices
+    for outcome in ("yes", "no")
+)
+
 
 class ArbitrageAgent:
     """Main agent with prolonged coordination - multi-day position tracking"""
@@ -24,11 +80,26 @@ class ArbitrageAgent:
         self.polymarket = PolymarketClient()
         self.kalshi = KalshiClient()
         self.db = get_db()
-        self.position_manager = PositionManager()
+        self.position_manager = PositionManager(buffer_logs=True)
         self.running = False
+        self._wake = threading.Event()
+        self.simulate_failures = DEMO_MODE
         self.api_failure_rate = 0.10
         self.retry_delay = 1
+        self.max_retry_delay = 10
         self.max_retries = 5
+        # Full jitter, capped, so agents don't retry in lockstep. Malformed
+        # data (ValueError) won't fix itself on retry; a None result will.
+        self._retryer = Retrying(
+            stop=stop_after_attempt(self.max_retries),
+            wait=wait_random_exponential(multiplier=self.retry_delay, max=self.max_retry_delay),
+            retry=(
+                retry_if_exception(lambda e: not isinstance(e, ValueError))
+                | retry_if_result(lambda result: result is None)
+            ),
+            before_sleep=self._log_retry,
+            reraise=True,
+        )
 
         self._resume_from_state()
 
@@ -41,19 +112,20 @@ class ArbitrageAgent:
             )
 
             active_positions = self.position_manager.get_active_positions()
-            print(f"🔄 Resuming: Found {len(active_positions)} active positions to monitor")
+            log.info("🔄 Resuming: Found %d active positions to monitor", len(active_positions))
 
             recent_tasks = self.position_manager.get_recent_tasks(limit=5)
             if recent_tasks:
-                print(
-                    f"   Last action: {recent_tasks[0].get('action')} "
-                    f"at {recent_tasks[0].get('timestamp')}"
+                log.info(
+                    "   Last action: %s at %s",
+                    recent_tasks[0].get("action"),
+                    recent_tasks[0].get("timestamp"),
                 )
 
             self.position_manager.calculate_historical_performance()
 
         except Exception as e:
-            print(f"⚠️ Error resuming state: {e}")
+            log.warning("⚠️ Error resuming state: %s", e)
             self.position_manager.log_task(
                 "recover",
                 "failure",
@@ -62,184 +134,256 @@ class ArbitrageAgent:
             )
 
     def _simulate_api_failure(self) -> bool:
-        return random.random() < self.api_failure_rate
+        return self.simulate_failures and random.random() < self.api_failure_rate
+
+    def _attempt_fetch(self, fetch_func, platform_name: str):
+        if self._simulate_api_failure():
+            raise Exception(f"Simulated {platform_name} API failure")
+        return fetch_func()
+
+    def _log_retry(self, retry_state):
+        platform_name = retry_state.args[1]
+        attempt = retry_state.attempt_number
+        max_retries = retry_state.retry_object.stop.max_attempt_number
+        error = retry_state.outcome.exception()
+        reason = str(error) if error else "no data returned"
+
+        log.warning("⚠️ %s API error (attempt %d/%d): %s", platform_name, attempt, max_retries, reason)
+        log.warning("   Retrying in %.1fs...", retry_state.next_action.sleep)
+        self.position_manager.log_task(
+            "fetch_prices",
+            "retry",
+            f"{platform_name} attempt {attempt}/{max_retries} failed",
+            error=reason,
+        )
 
     def _fetch_with_retry(self, fetch_func, platform_name: str, max_retries: int = None):
-        max_retries = max_retries or self.max_retries
-        delay = self.retry_delay
-
-        for attempt in range(max_retries):
-            try:
-                if self._simulate_api_failure() and attempt < max_retries - 1:
-                    raise Exception(f"Simulated {platform_name} API failure")
-
-                result = fetch_func()
-                if result is not None:
-                    self.retry_delay = 1
-                    return result
-
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    wait_time = delay * (2 ** attempt)
-                    print(
-                        f"⚠️ {platform_name} API error "
-                        f"(attempt {attempt + 1}/{max_retries}): {e}"
-                    )
-                    print(f"   Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    print(f"❌ {platform_name} API failed after {max_retries} attempts")
-                    return None
+        """
+        Call fetch_func until it returns a list of prices
+
+        fetch_func must return None on a transient (network) failure, which
+        is retried, and a list - possibly empty - otherwise.
+        """
+        retryer = self._retryer
+        if max_retries:
+            retryer = retryer.copy(stop=stop_after_attempt(max_retries))
 
+        try:
+            result = retryer(self._attempt_fetch, fetch_func, platform_name)
+            if not isinstance(result, list):
+                raise ValueError(f"expected a list of prices, got {type(result).__name__}")
+            # [] is a valid answer (no open markets), not a reason to retry
+            return result
+        except ValueError as e:
+            log.error("❌ %s returned bad data: %s", platform_name, e)
+        except Exception:
+            log.error("❌ %s API failed after %d attempts", platform_name, max_retries or self.max_retries)
         return None
 
-    def store_market_prices(self, prices: list, platform: str):
-        docs = []
-
-        for price_data in prices:
-            docs.append(
-                create_market_price_doc(
-                    market_id=price_data["market_id"],
-                    platform=platform,
-                    event_name=price_data["event_name"],
-                    outcome="yes",
-                    price=price_data["yes_price"],
-                )
+    def _price_docs(self, prices: list, platform: str, timestamp: datetime) -> list:
+        make_doc = create_market_price_doc
+        docs = [None] * (2 * len(prices))
+        for i, pd in enumerate(prices):
+            market_id, event_name = pd["market_id"], pd["event_name"]
+            docs[2 * i] = make_doc(market_id, platform, event_name, "yes", pd["yes_price"], timestamp)
+            docs[2 * i + 1] = make_doc(market_id, platform, event_name, "no", pd["no_price"], timestamp)
+        return docs
+
+    def _write_price_docs(self, docs: list):
+        if not docs:
+            return
+
+        platforms = ", ".join(dict.fromkeys(doc["platform"] for doc in docs))
+
+        # Upsert on the uniq_price key so a repeated snapshot within the
+        # same bucket is a no-op instead of a duplicate-key error
+        ops = [
+            UpdateOne(
+                {
+                    "market_id": doc["market_id"],
+                    "platform": doc["platform"],
+                    "outcome": doc["outcome"],
+                    "bucket": doc["bucket"],
+                },
+                {"$setOnInsert": doc},
+                upsert=True,
             )
-            docs.append(
-                create_market_price_doc(
-                    market_id=price_data["market_id"],
-                    platform=platform,
-                    event_name=price_data["event_name"],
-                    outcome="no",
-                    price=price_data["no_price"],
+            for doc in docs
+        ]
+        try:
+            result = self.db.market_prices.bulk_write(ops, ordered=False)
+            inserted = result.upserted_count
+        except BulkWriteError as bwe:
+            inserted = bwe.details.get("nUpserted", 0)
+            write_errors = bwe.details.get("writeErrors", ())
+            dup = sum(1 for we in write_errors if we.get("code") == DUPLICATE_KEY_ERROR)
+            non_dup = len(write_errors) - dup
+            if dup:
+                log.warning("⚠️ %d duplicate prices detected for %s (safe to ignore)", dup, platforms)
+            if non_dup:
+                log.error("❌ %d price records from %s failed to store", non_dup, platforms)
+                self.position_manager.log_task(
+                    "store_prices",
+                    "failure",
+                    f"{non_dup} {platforms} price writes failed",
+                    error=write_errors[0].get("errmsg") if write_errors else None,
                 )
-            )
-
-        if docs:
-            try:
-                result = self.db.market_prices.insert_many(docs, ordered=False)
-                print(f"✅ Stored {len(result.inserted_ids)} price records from {platform}")
-            except Exception:
-                print(f"⚠️ Duplicate prices detected for {platform} (safe to ignore)")
+        except PyMongoError as e:
+            log.error("❌ Failed to store prices from %s: %s", platforms, e)
+            return
+        log.info("✅ Stored %d price records from %s", inserted, platforms)
 
     # --------------------------------------------------
     # DEMO-SAFE PRICE FETCHING (NO LIVE APIS)
     # --------------------------------------------------
-    def fetch_and_store_prices(self, use_dummy_data=False):
-        print(f"\n🔄 Fetching prices at {datetime.now(timezone.utc).isoformat()}")
+    async def _fetch_prices(self, use_dummy_data=False, now: datetime = None):
+        """Return this iteration's (polymarket_prices, kalshi_prices, price_docs)"""
+        now = now or datetime.now(_UTC)
+        log.info("🔄 Fetching prices at %s", now.isoformat())
+        # Every price doc of this iteration shares the iteration's clock
+        # reading, stored as naive UTC like the rest of the collections
+        timestamp = now.astimezone(_UTC).replace(tzinfo=None)
 
         # FORCE DEMO MODE
         if use_dummy_data or DEMO_MODE:
-            print("🎲 DEMO MODE: Using deterministic prices (guaranteed arbitrage)")
-
-            polymarket_prices = [
-                {
-                    "market_id": "PM_LAKERS_WIN",
-                    "event_name": "Lakers vs Celtics",
-                    "yes_price": 0.58,
-                    "no_price": 0.44,
-                }
-            ]
-
-            kalshi_prices = [
-                {
-                    "market_id": "KALSHI_LAKERS_WIN",
-                    "event_name": "Lakers vs Celtics",
-                    "yes_price": 0.47,
-                    "no_price": 0.53,
-                }
-            ]
+            log.info("🎲 DEMO MODE: Using deterministic prices (guaranteed arbitrage)")
 
-            self.store_market_prices(polymarket_prices, "polymarket")
-            self.store_market_prices(kalshi_prices, "kalshi")
+            docs = [stamp_market_price_doc(dict(doc), timestamp) for doc in _DEMO_PRICE_DOCS]
 
-            return polymarket_prices, kalshi_prices
+            return DEMO_PRICES["polymarket"], DEMO_PRICES["kalshi"], docs
 
         # REAL API PATH (not used in demo)
-        pm_prices = self._fetch_with_retry(
-            lambda: self.polymarket.get_all_market_prices(limit=100),
-            "Polymarket",
-        ) or []
-
-        kalshi_prices = self._fetch_with_retry(
-            lambda: self.kalshi.get_all_market_prices(limit=100),
-            "Kalshi",
-        ) or []
-
-        return pm_prices, kalshi_prices
+        pm_prices, kalshi_prices = await self._fetch_all_prices()
+        pm_prices, kalshi_prices = pm_prices or [], kalshi_prices or []
+
+        docs = self._price_docs(pm_prices, "polymarket", timestamp)
+        docs.extend(self._price_docs(kalshi_prices, "kalshi", timestamp))
+
+        return pm_prices, kalshi_prices, docs
+
+    async def _fetch_all_prices(self):
+        """Fetch both platforms concurrently so one slow API doesn't block the other"""
+        return await asyncio.gather(
+            asyncio.to_thread(
+                self._fetch_with_retry,
+                lambda: self.polymarket.get_all_market_prices(limit=100),
+                "Polymarket",
+            ),
+            asyncio.to_thread(
+                self._fetch_with_retry,
+                lambda: self.kalshi.get_all_market_prices(limit=100),
+                "Kalshi",
+            ),
+        )
 
     def detect_arbitrage(self, pm_prices: list, kalshi_prices: list):
-        print("🔍 Detecting arbitrage opportunities...")
+        log.info("🔍 Detecting arbitrage opportunities...")
 
         opportunities = find_arbitrage_opportunities(pm_prices, kalshi_prices)
 
         if opportunities:
-            print(f"💰 Found {len(opportunities)} arbitrage opportunities!")
+            log.info("💰 Found %d arbitrage opportunities!", len(opportunities))
             store_arbitrage_opportunities(opportunities)
 
             for opp in opportunities[:5]:
                 position_id = self.position_manager.create_position_from_opportunity(opp)
-                print(f"📍 Created position for: {opp['event_name']}")
+                log.info("📍 Created position for: %s", opp["event_name"])
                 self.position_manager.simulate_order_placement(position_id)
         else:
-            print("ℹ️ No arbitrage opportunities found")
+            log.info("ℹ️ No arbitrage opportunities found")
 
     def monitor_positions(self):
         updated = self.position_manager.monitor_positions()
         if updated > 0:
-            print(f"📊 Resolved {updated} positions")
+            log.info("📊 Resolved %d positions", updated)
 
     def get_adaptive_poll_interval(self) -> int:
         return max(5, POLL_INTERVAL_SECONDS)
 
-    def run_once(self):
-        pm_prices, kalshi_prices = self.fetch_and_store_prices()
+    def run_once(self, now: datetime = None):
+        asyncio.run(self._run_once(now))
+
+    async def _run_once(self, now: datetime = None):
+        pm_prices, kalshi_prices, docs = await self._fetch_prices(now=now)
+
+        # Detection doesn't read stored prices, so overlap the snapshot
+        # write with it instead of waiting on the round-trip first
+        store = asyncio.create_task(asyncio.to_thread(self._write_price_docs, docs))
 
         if pm_prices and kalshi_prices:
-            self.detect_arbitrage(pm_prices, kalshi_prices)
+            await asyncio.to_thread(self.detect_arbitrage, pm_prices, kalshi_prices)
+
+        await asyncio.to_thread(self.monitor_positions)
+        await store
+        self.position_manager.flush_task_log()
 
-        self.monitor_positions()
+    def wake_now(self):
+        """Cut the current poll sleep short (e.g. on an external market event)"""
+        self._wake.set()
+
+    def stop(self):
+        """Stop after the current iteration without waiting out the sleep"""
+        self.running = False
+        self._wake.set()
 
     def run(self):
         self.running = True
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.stop())
 
         uptime = self.position_manager.get_agent_uptime()
         recovery_count = self.position_manager.get_recovery_count()
 
-        print("\n🚀 Arbitrage Agent - Prolonged Coordination System")
-        print("=" * 60)
-        print(f"📊 Running for: {uptime['days']} days, {uptime['hours']} hours")
-        print(f"📍 Positions tracked: {uptime['positions_tracked']}")
-        print(f"♻️ Recovery events: {recovery_count}")
-        print(f"🧠 State persistence: MongoDB Atlas")
-        print("=" * 60)
+        log.info("🚀 Arbitrage Agent - Prolonged Coordination System")
+        log.info("=" * 60)
+        log.info("📊 Running for: %d days, %d hours", uptime["days"], uptime["hours"])
+        log.info("📍 Positions tracked: %d", uptime["positions_tracked"])
+        log.info("♻️ Recovery events: %d", recovery_count)
+        log.info("🧠 State persistence: MongoDB Atlas")
+        log.info("=" * 60)
 
         iteration = 0
         try:
             while self.running:
                 iteration += 1
                 start = time.time()
+                now = datetime.now(_UTC)
 
-                print(
-                    f"\n[Iteration {iteration}] "
-                    f"{datetime.now(timezone.utc).strftime('%H:%M:%S UTC')}"
-                )
+                log.info("[Iteration %d] %s", iteration, now.strftime("%H:%M:%S UTC"))
 
-                self.run_once()
+                self.run_once(now)
 
                 sleep_time = max(0, self.get_adaptive_poll_interval() - (time.time() - start))
-                print(f"💤 Sleeping for {sleep_time:.1f}s")
-                time.sleep(sleep_time)
+                log.info("💤 Sleeping for %.1fs", sleep_time)
+                self._wake.wait(timeout=sleep_time)
+                self._wake.clear()
 
         except KeyboardInterrupt:
-            print("\n🛑 Agent stopped by user")
+            log.info("🛑 Agent stopped by user")
 
         finally:
             self.running = False
-            print("💾 State saved to MongoDB — agent can resume on restart")
+            self.position_manager.flush_task_log()
+            log.info("💾 State saved to MongoDB — agent can resume on restart")
+
+
+def _configure_logging():
+    """Route log records through a queue so stdout I/O happens off the agent loop"""
+    log_queue = queue.Queue(-1)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(message)s",
+        handlers=[logging.handlers.QueueHandler(log_queue)],
+    )
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    return listener
 
 
 if __name__ == "__main__":
-    agent = ArbitrageAgent()
-    agent.run()
+    listener = _configure_logging()
+    try:
+        agent = ArbitrageAgent()
+        agent.run()
+    finally:
+        listener.stop()
@@ -1,32 +1,90 @@
 """Flask web server for dashboard - Prolonged Coordination System"""
-from flask import Flask, render_template_string, jsonify
+import hashlib
+import os
+import time
+import orjson
+import rcssmin
+import rjsmin
+from threading import BoundedSemaphore, Lock, Thread
+from cachetools import TTLCache, cached
+from flask import Flask, Response, abort, jsonify, request
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from flask_compress import Compress
+from pymongo.errors import OperationFailure
 from datetime import datetime, timedelta
 from config import get_db, get_client
 from arbitrage import get_active_opportunities
 from position_manager import PositionManager
 
-app = Flask(__name__)
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson; naive datetimes are UTC, ObjectIds become strings"""
+    
+    option = orjson.OPT_NAIVE_UTC
+    
+    def dumps(self, obj, **kwargs):
+        return self.dumpb(obj).decode('utf-8')
+    
+    def dumpb(self, obj):
+        """Serialize straight to bytes, as sent on the wire"""
+        return orjson.dumps(obj, default=str, option=self.option)
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumpb(obj), mimetype='application/json')
+
+
+# Static assets are minified and served from memory (see static_asset)
+app = Flask(__name__, static_folder=None)
+app.json = ORJSONProvider(app)
 CORS(app)
 
+# Dashboard HTML and the polled JSON endpoints compress well
+app.config['COMPRESS_MIMETYPES'] = ['text/html', 'text/css', 'text/javascript', 'application/json']
+app.config['COMPRESS_LEVEL'] = 6
+# Prefer zstd, then brotli, where the browser offers them; gzip otherwise.
+# Small bodies (db-status, empty lists) aren't worth the framing
+app.config['COMPRESS_ALGORITHM'] = ['zstd', 'br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 512
+Compress(app)
+
 # Initialize position manager
 position_manager = PositionManager()
 
-# Helper function to categorize events
-def categorize_event(event_name):
-    """Categorize event by keywords"""
-    event_lower = event_name.lower()
-    if any(word in event_lower for word in ['election', 'president', 'senate', 'house', 'republican', 'democratic', 'midterm']):
-        return 'Politics'
-    elif any(word in event_lower for word in ['nba', 'nfl', 'super bowl', 'championship', 'world cup', 'warriors', 'lakers', 'chiefs']):
-        return 'Sports'
-    elif any(word in event_lower for word in ['bitcoin', 'ethereum', 'crypto', 'blockchain']):
-        return 'Crypto'
-    elif any(word in event_lower for word in ['fed', 'rate', 'recession', 'inflation', 'unemployment', 's&p', 'gold', 'dollar']):
-        return 'Economic'
-    elif any(word in event_lower for word in ['ai', 'gpt', 'openai', 'tesla', 'apple', 'google', 'amazon', 'spacex', 'quantum']):
-        return 'Tech'
-    return 'Other'
+# Every open dashboard polls the same endpoints, so share one encoded
+# result per endpoint for a few seconds instead of hitting MongoDB (and
+# re-serializing) for each request
+_opportunities_cache = TTLCache(maxsize=8, ttl=5)
+_opportunities_lock = Lock()
+_stats_cache = TTLCache(maxsize=1, ttl=10)
+_profit_timeseries_cache = TTLCache(maxsize=1, ttl=60)
+
+# Query cutoffs only change once a second; reuse them within that second
+_thresholds = (0, None, None, None)
+
+
+def _query_thresholds():
+    """Return (last_5m, last_hour, last_24h) cutoffs for the current second"""
+    global _thresholds
+    second = int(time.time())
+    cached_second, *cutoffs = _thresholds
+    if second != cached_second:
+        now = datetime.utcfromtimestamp(second)
+        cutoffs = [now - timedelta(minutes=5), now - timedelta(hours=1), now - timedelta(hours=24)]
+        _thresholds = (second, *cutoffs)
+    return tuple(cutoffs)
+
+
+# Recent prices are refreshed by a background thread; requests only read
+# the latest encoded snapshot
+RECENT_PRICES_REFRESH_SECONDS = 15
+_recent_prices = None
+_recent_prices_lock = Lock()
+_recent_prices_refresher = None
 
 # HTML template for dashboard
 DASHBOARD_HTML = """
@@ -37,166 +95,7 @@ DASHBOARD_HTML = """
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Arbitrage Hunter Dashboard</title>
     <script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js"></script>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: #0a0e27;
-            color: #e0e0e0;
-            padding: 20px;
-        }
-        .container { max-width: 1600px; margin: 0 auto; }
-        .header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 20px;
-        }
-        h1 { 
-            color: #4ade80; 
-            margin-bottom: 10px;
-            font-size: 2.5em;
-        }
-        .subtitle { color: #94a3b8; margin-bottom: 10px; }
-        .db-status {
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            padding: 8px 16px;
-            background: #1e293b;
-            border-radius: 6px;
-            border: 1px solid #334155;
-        }
-        .db-status-indicator {
-            width: 10px;
-            height: 10px;
-            border-radius: 50%;
-            background: #ef4444;
-        }
-        .db-status-indicator.connected {
-            background: #4ade80;
-            box-shadow: 0 0 8px #4ade80;
-        }
-        .stats {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            margin-bottom: 30px;
-        }
-        .stat-card {
-            background: #1e293b;
-            padding: 20px;
-            border-radius: 8px;
-            border: 1px solid #334155;
-        }
-        .stat-value {
-            font-size: 2em;
-            font-weight: bold;
-            color: #4ade80;
-        }
-        .stat-label {
-            color: #94a3b8;
-            font-size: 0.9em;
-            margin-top: 5px;
-        }
-        .section {
-            background: #1e293b;
-            border-radius: 8px;
-            padding: 25px;
-            margin-bottom: 30px;
-            border: 1px solid #334155;
-        }
-        .section h2 {
-            color: #60a5fa;
-            margin-bottom: 20px;
-            font-size: 1.5em;
-        }
-        .filters {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 10px;
-            margin-bottom: 20px;
-        }
-        .filter-btn {
-            padding: 8px 16px;
-            background: #0f172a;
-            border: 1px solid #334155;
-            color: #cbd5e1;
-            border-radius: 6px;
-            cursor: pointer;
-            font-size: 0.9em;
-            transition: all 0.2s;
-        }
-        .filter-btn:hover {
-            background: #1e293b;
-            border-color: #475569;
-        }
-        .filter-btn.active {
-            background: #3b82f6;
-            border-color: #3b82f6;
-            color: white;
-        }
-        table {
-            width: 100%;
-            border-collapse: collapse;
-            font-size: 0.9em;
-        }
-        th {
-            text-align: left;
-            padding: 12px;
-            background: #0f172a;
-            color: #cbd5e1;
-            font-weight: 600;
-            border-bottom: 2px solid #334155;
-            position: sticky;
-            top: 0;
-        }
-        td {
-            padding: 12px;
-            border-bottom: 1px solid #334155;
-        }
-        tr:hover { background: #0f172a; }
-        .profit-high {
-            color: #4ade80;
-            font-weight: bold;
-        }
-        .profit-medium {
-            color: #fbbf24;
-            font-weight: bold;
-        }
-        .profit-low {
-            color: #ef4444;
-            font-weight: bold;
-        }
-        .badge {
-            display: inline-block;
-            padding: 4px 8px;
-            border-radius: 4px;
-            font-size: 0.85em;
-            font-weight: 600;
-        }
-        .badge-polymarket { background: #3b82f6; color: white; }
-        .badge-kalshi { background: #8b5cf6; color: white; }
-        .refresh-btn {
-            background: #4ade80;
-            color: #0a0e27;
-            border: none;
-            padding: 10px 20px;
-            border-radius: 6px;
-            cursor: pointer;
-            font-weight: 600;
-            margin-bottom: 20px;
-        }
-        .refresh-btn:hover { background: #22c55e; }
-        .loading { text-align: center; padding: 40px; color: #94a3b8; }
-        .no-data { text-align: center; padding: 40px; color: #64748b; }
-        .timestamp { color: #64748b; font-size: 0.9em; margin-top: 10px; }
-        .chart-container {
-            position: relative;
-            height: 300px;
-            margin-top: 20px;
-        }
-    </style>
+    <link rel="stylesheet" href="/static/app.css?v={css_version}">
 </head>
 <body>
     <div class="container">
@@ -211,7 +110,7 @@ DASHBOARD_HTML = """
             </div>
         </div>
         
-        <button class="refresh-btn" onclick="loadData()">🔄 Refresh</button>
+        <button class="refresh-btn" onclick="refreshDashboard()">🔄 Refresh</button>
         <div id="timestamp" class="timestamp"></div>
         
         <div class="stats" id="stats">
@@ -315,581 +214,426 @@ DASHBOARD_HTML = """
         </div>
     </div>
     
-    <script>
-        let allOpportunities = [];
-        let profitChart = null;
-        let strategyChart = null;
-        
-        function formatCurrency(amount) {
-            return '$' + parseFloat(amount).toFixed(2);
-        }
-        
-        function formatPercent(value) {
-            return parseFloat(value).toFixed(2) + '%';
-        }
-        
-        function formatDate(dateString) {
-            const date = new Date(dateString);
-            return date.toLocaleString();
-        }
-        
-        function getProfitClass(profitPct) {
-            if (profitPct > 2) return 'profit-high';
-            if (profitPct >= 1) return 'profit-medium';
-            return 'profit-low';
-        }
-        
-        function calculateDaysUntilExpiry(expirationDate) {
-            if (!expirationDate) return 'N/A';
-            const exp = new Date(expirationDate);
-            const now = new Date();
-            const diff = Math.ceil((exp - now) / (1000 * 60 * 60 * 24));
-            return diff > 0 ? diff + ' days' : 'Expired';
-        }
-        
-        function checkDbStatus() {
-            fetch('/api/db-status')
-                .then(r => r.json())
-                .then(data => {
-                    const indicator = document.getElementById('db-status');
-                    const text = document.getElementById('db-status-text');
-                    if (data.connected) {
-                        indicator.classList.add('connected');
-                        text.textContent = 'MongoDB Connected';
-                    } else {
-                        indicator.classList.remove('connected');
-                        text.textContent = 'MongoDB Disconnected';
-                    }
-                })
-                .catch(e => {
-                    document.getElementById('db-status-text').textContent = 'Status Unknown';
-                });
-        }
-        
-        function loadData() {
-            // Load opportunities
-            fetch('/api/opportunities')
-                .then(r => r.json())
-                .then(data => {
-                    allOpportunities = data;
-                    displayOpportunities(data);
-                    updateStats(data);
-                    updateProfitChart(data);
-                })
-                .catch(e => {
-                    document.getElementById('opportunities-table').innerHTML = 
-                        '<div class="no-data">Error loading opportunities</div>';
-                });
-            
-            // Load recent prices
-            fetch('/api/recent-prices')
-                .then(r => r.json())
-                .then(data => displayPrices(data))
-                .catch(e => {
-                    document.getElementById('prices-table').innerHTML = 
-                        '<div class="no-data">Error loading prices</div>';
-                });
-            
-            // Load stats
-            loadStats();
-            
-            // Load positions
-            loadPositions();
-            
-            // Load task history
-            loadTaskHistory();
-            
-            // Load agent status
-            loadAgentStatus();
-            
-            // Load strategy evolution
-            loadStrategyEvolution();
-            
-            document.getElementById('timestamp').textContent = 
-                'Last updated: ' + new Date().toLocaleString();
-        }
-        
-        function loadPositions() {
-            fetch('/api/positions')
-                .then(r => r.json())
-                .then(data => displayPositions(data))
-                .catch(e => {
-                    document.getElementById('positions-table').innerHTML = 
-                        '<div class="no-data">Error loading positions</div>';
-                });
-        }
-        
-        function displayPositions(positions) {
-            const container = document.getElementById('positions-table');
-            
-            if (!positions || positions.length === 0) {
-                container.innerHTML = '<div class="no-data">No active positions being tracked</div>';
-                return;
-            }
-            
-            let html = '<table><thead><tr>';
-            html += '<th>Event</th><th>State</th><th>Platform A</th><th>Platform B</th>';
-            html += '<th>Target Profit</th><th>Days Held</th><th>Days Until Expiry</th>';
-            html += '<th>Created</th></tr></thead><tbody>';
-            
-            positions.forEach(pos => {
-                const stateClass = pos.state === 'entered' ? 'profit-high' : 
-                                  pos.state === 'watching' ? 'profit-medium' : 'profit-low';
-                html += '<tr>';
-                html += '<td>' + (pos.event_name || 'N/A').substring(0, 50) + '</td>';
-                html += '<td><span class="' + stateClass + '">' + (pos.state || 'N/A').toUpperCase() + '</span></td>';
-                html += '<td><span class="badge badge-' + pos.platform_a + '">' + pos.platform_a + '</span></td>';
-                html += '<td><span class="badge badge-' + pos.platform_b + '">' + pos.platform_b + '</span></td>';
-                html += '<td class="profit-high">' + formatCurrency(pos.target_profit || 0) + '</td>';
-                html += '<td>' + (pos.days_held || 0) + ' days</td>';
-                html += '<td>' + (pos.days_until_expiry !== undefined ? pos.days_until_expiry + ' days' : 'N/A') + '</td>';
-                html += '<td>' + formatDate(pos.created_at) + '</td>';
-                html += '</tr>';
-            });
-            
-            html += '</tbody></table>';
-            container.innerHTML = html;
-        }
-        
-        function loadTaskHistory() {
-            fetch('/api/task-history')
-                .then(r => r.json())
-                .then(data => displayTaskHistory(data))
-                .catch(e => {
-                    document.getElementById('task-history').innerHTML = 
-                        '<div class="no-data">Error loading task history</div>';
-                });
-        }
-        
-        function displayTaskHistory(tasks) {
-            const container = document.getElementById('task-history');
-            
-            if (!tasks || tasks.length === 0) {
-                container.innerHTML = '<div class="no-data">No task history available</div>';
-                return;
-            }
-            
-            let html = '<table><thead><tr>';
-            html += '<th>Timestamp</th><th>Action</th><th>Status</th><th>Details</th><th>Error</th></tr></thead><tbody>';
-            
-            tasks.slice(0, 20).forEach(task => {
-                const statusClass = task.status === 'success' ? 'profit-high' : 
-                                   task.status === 'failure' ? 'profit-low' : 'profit-medium';
-                html += '<tr>';
-                html += '<td>' + formatDate(task.timestamp) + '</td>';
-                html += '<td><strong>' + (task.action || 'N/A') + '</strong></td>';
-                html += '<td><span class="' + statusClass + '">' + (task.status || 'N/A').toUpperCase() + '</span></td>';
-                html += '<td>' + (task.details || '').substring(0, 60) + '</td>';
-                html += '<td style="color: #ef4444;">' + (task.error || '-') + '</td>';
-                html += '</tr>';
-            });
-            
-            html += '</tbody></table>';
-            container.innerHTML = html;
-        }
-        
-        function loadAgentStatus() {
-            fetch('/api/agent-status')
-                .then(r => r.json())
-                .then(data => {
-                    document.getElementById('agent-uptime').textContent = 
-                        data.days + 'd ' + data.hours + 'h';
-                    document.getElementById('positions-tracked').textContent = data.positions_tracked;
-                })
-                .catch(e => console.error('Error loading agent status:', e));
-        }
-        
-        function loadStrategyEvolution() {
-            fetch('/api/strategy-evolution')
-                .then(r => r.json())
-                .then(data => updateStrategyChart(data))
-                .catch(e => console.error('Error loading strategy data:', e));
-        }
-        
-        function updateStrategyChart(performanceData) {
-            const ctx = document.getElementById('strategyChart');
-            
-            if (!performanceData || performanceData.length === 0) {
-                if (strategyChart) strategyChart.destroy();
-                return;
-            }
-            
-            const labels = performanceData.map(p => p.market_type || 'Unknown');
-            const successRates = performanceData.map(p => p.success_rate || 0);
-            const avgProfits = performanceData.map(p => p.avg_profit_pct || 0);
-            
-            if (strategyChart) {
-                strategyChart.destroy();
-            }
-            
-            strategyChart = new Chart(ctx, {
-                type: 'bar',
-                data: {
-                    labels: labels,
-                    datasets: [{
-                        label: 'Success Rate %',
-                        data: successRates,
-                        backgroundColor: 'rgba(74, 222, 128, 0.6)',
-                        borderColor: '#4ade80',
-                        yAxisID: 'y'
-                    }, {
-                        label: 'Avg Profit %',
-                        data: avgProfits,
-                        backgroundColor: 'rgba(96, 165, 250, 0.6)',
-                        borderColor: '#60a5fa',
-                        yAxisID: 'y1'
-                    }]
-                },
-                options: {
-                    responsive: true,
-                    maintainAspectRatio: false,
-                    plugins: {
-                        legend: {
-                            labels: { color: '#cbd5e1' }
-                        }
-                    },
-                    scales: {
-                        x: {
-                            ticks: { color: '#94a3b8' },
-                            grid: { color: '#334155' }
-                        },
-                        y: {
-                            type: 'linear',
-                            display: true,
-                            position: 'left',
-                            ticks: { color: '#94a3b8', callback: function(value) { return value + '%'; } },
-                            grid: { color: '#334155' }
-                        },
-                        y1: {
-                            type: 'linear',
-                            display: true,
-                            position: 'right',
-                            ticks: { color: '#94a3b8', callback: function(value) { return value + '%'; } },
-                            grid: { drawOnChartArea: false, color: '#334155' }
-                        }
-                    }
-                }
-            });
-        }
-        
-        function filterOpportunities(filter) {
-            // Update active button
-            document.querySelectorAll('.filter-btn').forEach(btn => {
-                btn.classList.remove('active');
-            });
-            event.target.classList.add('active');
-            
-            let filtered = allOpportunities;
-            
-            if (filter === 'high') {
-                filtered = allOpportunities.filter(o => o.profit_percentage > 3);
-            } else if (filter === 'expiring') {
-                filtered = allOpportunities.filter(o => {
-                    const days = calculateDaysUntilExpiry(o.expiration_date);
-                    return days !== 'N/A' && days !== 'Expired' && parseInt(days) < 7;
-                });
-            } else if (filter === 'sports') {
-                filtered = allOpportunities.filter(o => {
-                    const name = (o.event_name || '').toLowerCase();
-                    return name.includes('nba') || name.includes('nfl') || name.includes('super bowl') || 
-                           name.includes('championship') || name.includes('world cup') || 
-                           name.includes('warriors') || name.includes('lakers') || name.includes('chiefs');
-                });
-            } else if (filter === 'politics') {
-                filtered = allOpportunities.filter(o => {
-                    const name = (o.event_name || '').toLowerCase();
-                    return name.includes('election') || name.includes('president') || name.includes('senate') || 
-                           name.includes('house') || name.includes('republican') || name.includes('democratic') || 
-                           name.includes('midterm');
-                });
-            } else if (filter === 'crypto') {
-                filtered = allOpportunities.filter(o => {
-                    const name = (o.event_name || '').toLowerCase();
-                    return name.includes('bitcoin') || name.includes('ethereum') || name.includes('crypto') || 
-                           name.includes('blockchain');
-                });
-            }
-            
-            displayOpportunities(filtered);
-        }
-        
-        function displayOpportunities(opps) {
-            const container = document.getElementById('opportunities-table');
-            
-            if (!opps || opps.length === 0) {
-                container.innerHTML = '<div class="no-data">No arbitrage opportunities found</div>';
-                return;
-            }
-            
-            let html = '<table><thead><tr>';
-            html += '<th>Event</th><th>Platform A</th><th>Price A</th>';
-            html += '<th>Platform B</th><th>Price B</th>';
-            html += '<th>Bet Amount A</th><th>Bet Amount B</th>';
-            html += '<th>Profit ($)</th><th>Profit %</th><th>Time to Expiry</th><th>Detected</th></tr></thead><tbody>';
-            
-            opps.forEach(opp => {
-                const profitPct = opp.profit_percentage || 0;
-                const profitDollars = opp.profit || ((opp.bet_amount_a + opp.bet_amount_b) * profitPct / 100);
-                const profitClass = getProfitClass(profitPct);
-                const daysUntilExpiry = calculateDaysUntilExpiry(opp.expiration_date);
-                
-                html += '<tr>';
-                html += '<td>' + (opp.event_name || 'N/A').substring(0, 50) + '</td>';
-                html += '<td><span class="badge badge-' + opp.platform_a + '">' + opp.platform_a + '</span></td>';
-                html += '<td>' + (opp.platform_a_price * 100).toFixed(2) + '%</td>';
-                html += '<td><span class="badge badge-' + opp.platform_b + '">' + opp.platform_b + '</span></td>';
-                html += '<td>' + (opp.platform_b_price * 100).toFixed(2) + '%</td>';
-                html += '<td>' + formatCurrency(opp.bet_amount_a) + '</td>';
-                html += '<td>' + formatCurrency(opp.bet_amount_b) + '</td>';
-                html += '<td class="' + profitClass + '">' + formatCurrency(profitDollars) + '</td>';
-                html += '<td class="' + profitClass + '">' + formatPercent(profitPct) + '</td>';
-                html += '<td>' + daysUntilExpiry + '</td>';
-                html += '<td>' + formatDate(opp.detected_at) + '</td>';
-                html += '</tr>';
-            });
-            
-            html += '</tbody></table>';
-            container.innerHTML = html;
-        }
-        
-        function displayPrices(prices) {
-            const container = document.getElementById('prices-table');
-            
-            if (!prices || prices.length === 0) {
-                container.innerHTML = '<div class="no-data">No recent prices available</div>';
-                return;
-            }
-            
-            let html = '<table><thead><tr>';
-            html += '<th>Event</th><th>Platform</th><th>Outcome</th>';
-            html += '<th>Price</th><th>Timestamp</th></tr></thead><tbody>';
-            
-            prices.forEach(price => {
-                html += '<tr>';
-                html += '<td>' + (price.event_name || 'N/A').substring(0, 50) + '</td>';
-                html += '<td><span class="badge badge-' + price.platform + '">' + price.platform + '</span></td>';
-                html += '<td>' + (price.outcome || 'N/A').toUpperCase() + '</td>';
-                html += '<td>' + (price.price * 100).toFixed(2) + '%</td>';
-                html += '<td>' + formatDate(price.timestamp) + '</td>';
-                html += '</tr>';
-            });
-            
-            html += '</tbody></table>';
-            container.innerHTML = html;
-        }
-        
-        function updateStats(opps) {
-            if (opps) {
-                document.getElementById('active-opps').textContent = opps.length;
-            }
-        }
-        
-        function loadStats() {
-            fetch('/api/stats')
-                .then(r => r.json())
-                .then(data => {
-                    document.getElementById('active-opps').textContent = data.active_opportunities || 0;
-                    document.getElementById('total-24h').textContent = data.total_24h || 0;
-                    document.getElementById('avg-profit').textContent = formatPercent(data.avg_profit_percentage || 0);
-                    document.getElementById('top-profit').textContent = formatPercent(data.max_profit_percentage || 0);
-                    document.getElementById('total-profit').textContent = formatCurrency(data.total_profit_captured || 0);
-                    document.getElementById('recovery-events').textContent = data.recovery_events || 0;
-                })
-                .catch(e => console.error('Error loading stats:', e));
-        }
-        
-        function updateProfitChart(opps) {
-            const ctx = document.getElementById('profitChart');
-            
-            // Generate hourly data for last 24 hours
-            const now = new Date();
-            const labels = [];
-            const data = [];
-            
-            for (let i = 23; i >= 0; i--) {
-                const hour = new Date(now.getTime() - i * 60 * 60 * 1000);
-                labels.push(hour.getHours() + ':00');
-                // Simulate profit % over time (in real app, this would come from historical data)
-                const baseProfit = 2.5;
-                const variation = Math.sin(i / 3) * 0.5;
-                data.push((baseProfit + variation).toFixed(2));
-            }
-            
-            if (profitChart) {
-                profitChart.destroy();
-            }
-            
-            profitChart = new Chart(ctx, {
-                type: 'line',
-                data: {
-                    labels: labels,
-                    datasets: [{
-                        label: 'Average Profit %',
-                        data: data,
-                        borderColor: '#4ade80',
-                        backgroundColor: 'rgba(74, 222, 128, 0.1)',
-                        tension: 0.4,
-                        fill: true
-                    }]
-                },
-                options: {
-                    responsive: true,
-                    maintainAspectRatio: false,
-                    plugins: {
-                        legend: {
-                            labels: { color: '#cbd5e1' }
-                        }
-                    },
-                    scales: {
-                        x: {
-                            ticks: { color: '#94a3b8' },
-                            grid: { color: '#334155' }
-                        },
-                        y: {
-                            ticks: { color: '#94a3b8', callback: function(value) { return value + '%'; } },
-                            grid: { color: '#334155' }
-                        }
-                    }
-                }
-            });
-        }
-        
-        // Load data on page load
-        loadData();
-        checkDbStatus();
-        
-        // Auto-refresh every 30 seconds
-        setInterval(() => {
-            loadData();
-            checkDbStatus();
-        }, 30000);
-    </script>
+    <template id="opportunities-table-template">
+        <table>
+            <thead><tr>
+                <th>Event</th><th>Platform A</th><th>Price A</th>
+                <th>Platform B</th><th>Price B</th>
+                <th>Bet Amount A</th><th>Bet Amount B</th>
+                <th>Profit ($)</th><th>Profit %</th><th>Time to Expiry</th><th>Detected</th>
+            </tr></thead>
+            <tbody></tbody>
+        </table>
+    </template>
+    <template id="opportunity-row-template">
+        <tr>
+            <td data-field="event"></td>
+            <td><span class="badge" data-field="platform-a"></span></td>
+            <td data-field="price-a"></td>
+            <td><span class="badge" data-field="platform-b"></span></td>
+            <td data-field="price-b"></td>
+            <td data-field="bet-a"></td>
+            <td data-field="bet-b"></td>
+            <td data-field="profit"></td>
+            <td data-field="profit-pct"></td>
+            <td data-field="expiry"></td>
+            <td data-field="detected"></td>
+        </tr>
+    </template>
+    <template id="prices-table-template">
+        <table>
+            <thead><tr>
+                <th>Event</th><th>Platform</th><th>Outcome</th>
+                <th>Price</th><th>Timestamp</th>
+            </tr></thead>
+            <tbody></tbody>
+        </table>
+    </template>
+    <template id="price-row-template">
+        <tr>
+            <td data-field="event"></td>
+            <td><span class="badge" data-field="platform"></span></td>
+            <td data-field="outcome"></td>
+            <td data-field="price"></td>
+            <td data-field="timestamp"></td>
+        </tr>
+    </template>
+    
+    <script src="/static/app.js?v={js_version}"></script>
 </body>
 </html>
 """
 
 
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+STATIC_CACHE_CONTROL = 'public, max-age=86400, immutable'
+
+
+def _load_static_assets():
+    """Read and minify the dashboard's CSS/JS once; returns name -> (bytes, etag, mimetype)"""
+    minifiers = {
+        'app.css': (rcssmin.cssmin, 'text/css'),
+        'app.js': (rjsmin.jsmin, 'text/javascript'),
+    }
+    assets = {}
+    for name, (minify, mimetype) in minifiers.items():
+        with open(os.path.join(STATIC_DIR, name), encoding='utf-8') as f:
+            body = minify(f.read()).encode('utf-8')
+        assets[name] = (body, hashlib.md5(body).hexdigest(), mimetype)
+    return assets
+
+
+def _cacheable_response(body, mimetype, etag, cache_control):
+    """Serve fixed bytes with an ETag, answering matching revalidations with 304"""
+    headers = {'Cache-Control': cache_control, 'ETag': f'"{etag}"'}
+    # Flask-Compress suffixes the ETag it sends with the encoding (":gzip")
+    if any(tag.split(':', 1)[0] == etag for tag in request.if_none_match):
+        return Response(status=304, headers=headers)
+    return Response(body, mimetype=mimetype, headers=headers)
+
+
+_STATIC_ASSETS = _load_static_assets()
+
+# The dashboard only varies with the asset versions, so render and encode
+# it once and let browsers revalidate against a fixed ETag
+_DASHBOARD_BYTES = DASHBOARD_HTML.format(
+    css_version=_STATIC_ASSETS['app.css'][1][:12],
+    js_version=_STATIC_ASSETS['app.js'][1][:12],
+).encode('utf-8')
+_DASHBOARD_ETAG = hashlib.md5(_DASHBOARD_BYTES).hexdigest()
+
+
 @app.route('/')
 def dashboard():
-    """Render the dashboard"""
-    return render_template_string(DASHBOARD_HTML)
+    """Serve the dashboard"""
+    return _cacheable_response(_DASHBOARD_BYTES, 'text/html', _DASHBOARD_ETAG, 'public, max-age=300')
+
+
+@app.route('/static/<name>')
+def static_asset(name):
+    """Serve a minified dashboard asset; URLs carry a version so they never go stale"""
+    if name not in _STATIC_ASSETS:
+        abort(404)
+    body, etag, mimetype = _STATIC_ASSETS[name]
+    return _cacheable_response(body, mimetype, etag, STATIC_CACHE_CONTROL)
 
 
 @app.route('/api/opportunities')
 def api_opportunities():
     """API endpoint for active arbitrage opportunities"""
     try:
-        opportunities = get_active_opportunities(limit=50)
-        # Add profit calculation and expiration dates
-        for opp in opportunities:
-            if 'profit' not in opp or opp.get('profit') == 0:
-                total_investment = opp.get('bet_amount_a', 0) + opp.get('bet_amount_b', 0)
-                profit_pct = opp.get('profit_percentage', 0) / 100
-                opp['profit'] = round(total_investment * profit_pct / (1 + profit_pct), 2)
-        return jsonify(opportunities)
+        return _json_bytes_response(_compute_opportunities(request.args.get('category')))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@cached(_opportunities_cache, lock=_opportunities_lock)
+def _compute_opportunities(category=None):
+    """Active opportunities (optionally one category) as JSON, cached for a few seconds"""
+    return app.json.dumpb(get_active_opportunities(limit=50, category=category))
+
+
+# Resume token of the last change that dropped the cached opportunities
+_invalidated_by = None
+
+
+def _invalidate_opportunities(token):
+    """Drop the cached opportunities once per change, however many streams saw it"""
+    global _invalidated_by
+    with _opportunities_lock:
+        if token != _invalidated_by:
+            _invalidated_by = token
+            _opportunities_cache.clear()
+
+
+def _json_bytes_response(body):
+    """Wrap already-encoded JSON in a response"""
+    return app.response_class(body, mimetype='application/json')
+
+
+# Seconds between keep-alive comments on an idle stream, and between
+# snapshot checks when change streams are unavailable
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_POLL_SECONDS = 5
+# Longest wait for the next change; also how long a burst of inserts
+# can take to be coalesced into one message
+STREAM_BURST_SECONDS = 1
+# Each open stream pins a server thread, so only half of a worker's
+# threads may serve streams; tabs past the cap poll /api/opportunities
+MAX_STREAMS = int(os.getenv(
+    "DASHBOARD_MAX_STREAMS", max(1, int(os.getenv("DASHBOARD_THREADS", "8")) // 2)
+))
+_stream_slots = BoundedSemaphore(MAX_STREAMS)
+
+
+@app.route('/api/stream')
+def api_stream():
+    """Server-sent events carrying the active opportunities whenever they change"""
+    if not _stream_slots.acquire(blocking=False):
+        return jsonify({"error": "too many open streams"}), 503
+    response = Response(
+        _opportunity_events(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Runs when the server closes the response, even if it was never iterated
+    response.call_on_close(_stream_slots.release)
+    return response
+
+
+def _sse(body):
+    """Format an encoded opportunities snapshot as one SSE message"""
+    return b"data: " + body + b"\n\n"
+
+
+def _opportunity_events():
+    """Yield a snapshot now and again after each burst of new opportunities"""
+    db = get_db()
+    last_sent = _sse(_compute_opportunities())
+    yield last_sent
+    try:
+        with db.arbitrage_opportunities.watch(
+            [{"$match": {"operationType": "insert"}}],
+            max_await_time_ms=STREAM_BURST_SECONDS * 1000
+        ) as changes:
+            idle = 0
+            while changes.alive:
+                if changes.try_next() is None:
+                    idle += STREAM_BURST_SECONDS
+                    if idle >= STREAM_HEARTBEAT_SECONDS:
+                        idle = 0
+                        yield b": keep-alive\n\n"
+                    continue
+                # A detector run inserts several opportunities at once;
+                # drain them all and send a single snapshot for the burst
+                while changes.try_next() is not None:
+                    pass
+                _invalidate_opportunities(changes.resume_token)
+                message = _sse(_compute_opportunities())
+                if message != last_sent:
+                    last_sent = message
+                    idle = 0
+                    yield message
+    except OperationFailure:
+        # Change streams need a replica set; otherwise push only when the
+        # cached snapshot differs from the last one sent
+        pass
+    
+    idle = 0
+    while True:
+        time.sleep(STREAM_POLL_SECONDS)
+        message = _sse(_compute_opportunities())
+        if message != last_sent:
+            last_sent = message
+            idle = 0
+            yield message
+        else:
+            idle += STREAM_POLL_SECONDS
+            if idle >= STREAM_HEARTBEAT_SECONDS:
+                idle = 0
+                yield b": keep-alive\n\n"
+
+
 @app.route('/api/recent-prices')
 def api_recent_prices():
     """API endpoint for recent market prices"""
     try:
-        db = get_db()
-        cutoff_time = datetime.utcnow() - timedelta(hours=1)
-        
-        pipeline = [
-            {"$match": {"timestamp": {"$gte": cutoff_time}}},
-            {"$sort": {"timestamp": -1}},
-            {"$group": {
-                "_id": {"event": "$event_name", "platform": "$platform", "outcome": "$outcome"},
-                "latest": {"$first": "$$ROOT"}
-            }},
-            {"$replaceRoot": {"newRoot": "$latest"}},
-            {"$sort": {"timestamp": -1}},
-            {"$limit": 20}
-        ]
-        
-        prices = list(db.market_prices.aggregate(pipeline))
-        
-        for price in prices:
-            price["_id"] = str(price["_id"])
-            price["timestamp"] = price["timestamp"].isoformat()
-        
-        return jsonify(prices)
+        _start_recent_prices_refresher()
+        prices = _recent_prices
+        if prices is None:
+            # First request beat the refresher's first pass
+            prices = _compute_recent_prices()
+        return _json_bytes_response(prices)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def _start_recent_prices_refresher():
+    """Start the recent prices refresher thread once per process"""
+    global _recent_prices_refresher
+    if _recent_prices_refresher is not None:
+        return
+    with _recent_prices_lock:
+        if _recent_prices_refresher is None:
+            _recent_prices_refresher = Thread(
+                target=_refresh_recent_prices, name="recent-prices", daemon=True
+            )
+            _recent_prices_refresher.start()
+
+
+def _refresh_recent_prices():
+    """Re-run the recent prices aggregation every RECENT_PRICES_REFRESH_SECONDS"""
+    global _recent_prices
+    while True:
+        try:
+            _recent_prices = _compute_recent_prices()
+        except Exception:
+            app.logger.exception("Error refreshing recent prices")
+        time.sleep(RECENT_PRICES_REFRESH_SECONDS)
+
+
+def _compute_recent_prices():
+    """Latest price per event/platform/outcome over the last hour, as JSON"""
+    db = get_db()
+    _, cutoff_time, _ = _query_thresholds()
+    
+    pipeline = [
+        {"$match": {"timestamp": {"$gte": cutoff_time}}},
+        {"$sort": {"timestamp": -1}},
+        # Only carry the fields the prices table shows through the group
+        {"$project": {
+            "_id": 0,
+            "event_name": 1,
+            "platform": 1,
+            "outcome": 1,
+            "price": 1,
+            "timestamp": 1
+        }},
+        {"$group": {
+            "_id": {"event": "$event_name", "platform": "$platform", "outcome": "$outcome"},
+            "latest": {"$first": "$$ROOT"}
+        }},
+        {"$replaceRoot": {"newRoot": "$latest"}},
+        {"$sort": {"timestamp": -1}},
+        {"$limit": 20}
+    ]
+    
+    return app.json.dumpb(list(db.market_prices.aggregate(pipeline, batchSize=20)))
+
+
 @app.route('/api/stats')
 def api_stats():
     """API endpoint for statistics"""
     try:
-        db = get_db()
-        cutoff_time = datetime.utcnow() - timedelta(minutes=5)
-        last_24h = datetime.utcnow() - timedelta(hours=24)
-        
-        active_count = db.arbitrage_opportunities.count_documents({
-            "status": "active",
-            "detected_at": {"$gte": cutoff_time}
-        })
-        
-        total_24h = db.arbitrage_opportunities.count_documents({
-            "detected_at": {"$gte": last_24h}
-        })
-        
-        # Average and max profit
-        pipeline = [
-            {"$match": {
-                "status": "active",
-                "detected_at": {"$gte": cutoff_time},
-                "profit_percentage": {"$exists": True}
-            }},
-            {"$group": {
-                "_id": None,
-                "avg_profit": {"$avg": "$profit_percentage"},
-                "max_profit": {"$max": "$profit_percentage"}
-            }}
-        ]
-        result = list(db.arbitrage_opportunities.aggregate(pipeline))
-        avg_profit = result[0]["avg_profit"] if result and result[0].get("avg_profit") else 0
-        max_profit = result[0]["max_profit"] if result and result[0].get("max_profit") else 0
-        
-        # Total profit captured (sum of all historical opportunities)
-        total_profit_pipeline = [
-            {"$group": {
-                "_id": None,
-                "total_profit": {"$sum": "$profit"}
-            }}
-        ]
-        total_profit_result = list(db.arbitrage_opportunities.aggregate(total_profit_pipeline))
-        total_profit = total_profit_result[0]["total_profit"] if total_profit_result and total_profit_result[0].get("total_profit") else 0
-        
-        # If no profit field, calculate from profit_percentage
-        if total_profit == 0:
-            all_opps = list(db.arbitrage_opportunities.find({}))
-            total_profit = sum(
-                (opp.get('bet_amount_a', 0) + opp.get('bet_amount_b', 0)) * (opp.get('profit_percentage', 0) / 100) / (1 + opp.get('profit_percentage', 0) / 100)
-                for opp in all_opps
-            )
-        
-        # Get recovery events count
-        recovery_events = position_manager.get_recovery_count()
-        
-        return jsonify({
-            "active_opportunities": active_count,
-            "total_24h": total_24h,
-            "avg_profit_percentage": round(avg_profit, 2),
-            "max_profit_percentage": round(max_profit, 2),
-            "total_profit_captured": round(total_profit, 2),
-            "recovery_events": recovery_events
-        })
+        return _json_bytes_response(_compute_stats())
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        app.logger.exception("Error computing stats")
         return jsonify({"error": str(e)}), 500
 
 
+@cached(_stats_cache, lock=Lock())
+def _compute_stats():
+    """Opportunity and recovery stats for the dashboard cards, as JSON"""
+    db = get_db()
+    cutoff_time, _, last_24h = _query_thresholds()
+    
+    active_match = {"detected_at": {"$gte": cutoff_time}}
+    pct = {"$divide": [{"$ifNull": ["$profit_percentage", 0]}, 100]}
+    
+    # One round-trip for every opportunity stat, carrying only the fields
+    # the facets read
+    pipeline = [
+        {"$project": {
+            "_id": 0,
+            "detected_at": 1,
+            "profit": 1,
+            "profit_percentage": 1,
+            "bet_amount_a": 1,
+            "bet_amount_b": 1
+        }},
+        {"$facet": {
+            "active": [
+                {"$match": active_match},
+                {"$count": "n"}
+            ],
+            "last_24h": [
+                {"$match": {"detected_at": {"$gte": last_24h}}},
+                {"$count": "n"}
+            ],
+            # Average and max profit
+            "profit_stats": [
+                {"$match": {**active_match, "profit_percentage": {"$exists": True}}},
+                {"$group": {
+                    "_id": None,
+                    "avg_profit": {"$avg": "$profit_percentage"},
+                    "max_profit": {"$max": "$profit_percentage"}
+                }}
+            ],
+            # Total profit captured (sum of all retained opportunities),
+            # derived from profit_percentage for docs without a profit field
+            "total_profit": [
+                {"$group": {
+                    "_id": None,
+                    "total_profit": {"$sum": "$profit"},
+                    "derived_profit": {"$sum": {"$multiply": [
+                        {"$add": [
+                            {"$ifNull": ["$bet_amount_a", 0]},
+                            {"$ifNull": ["$bet_amount_b", 0]}
+                        ]},
+                        pct
+                    ]}}
+                }}
+            ]
+        }}
+    ]
+    facets = next(db.arbitrage_opportunities.aggregate(pipeline))
+    
+    def facet_value(name, field):
+        rows = facets[name]
+        return (rows[0].get(field) or 0) if rows else 0
+    
+    active_count = facet_value("active", "n")
+    total_24h = facet_value("last_24h", "n")
+    avg_profit = facet_value("profit_stats", "avg_profit")
+    max_profit = facet_value("profit_stats", "max_profit")
+    total_profit = facet_value("total_profit", "total_profit")
+    
+    # If no profit field, use the value calculated from profit_percentage
+    if total_profit == 0:
+        total_profit = facet_value("total_profit", "derived_profit")
+    
+    # Get recovery events count
+    recovery_events = position_manager.get_recovery_count()
+    
+    return app.json.dumpb({
+        "active_opportunities": active_count,
+        "total_24h": total_24h,
+        "avg_profit_percentage": round(avg_profit, 2),
+        "max_profit_percentage": round(max_profit, 2),
+        "total_profit_captured": round(total_profit, 2),
+        "recovery_events": recovery_events
+    })
+
+
+@app.route('/api/profit-timeseries')
+def api_profit_timeseries():
+    """API endpoint for average opportunity profit per hour over the last 24 hours"""
+    try:
+        return _json_bytes_response(_compute_profit_timeseries())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@cached(_profit_timeseries_cache, lock=Lock())
+def _compute_profit_timeseries():
+    """Hourly average profit_percentage for the 24 hours up to the current one, as JSON"""
+    db = get_db()
+    current_hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    hour_starts = [current_hour - timedelta(hours=h) for h in range(23, -1, -1)]
+    
+    pipeline = [
+        {"$match": {"detected_at": {"$gte": hour_starts[0]}}},
+        {"$bucket": {
+            "groupBy": "$detected_at",
+            "boundaries": hour_starts + [current_hour + timedelta(hours=1)],
+            "default": "later",
+            "output": {"avg": {"$avg": "$profit_percentage"}}
+        }}
+    ]
+    averages = {
+        row["_id"]: row["avg"]
+        for row in db.arbitrage_opportunities.aggregate(pipeline)
+    }
+    
+    return app.json.dumpb([
+        {
+            "hour": hour,
+            "avg_profit_percentage": round(averages[hour], 2) if averages.get(hour) is not None else None
+        }
+        for hour in hour_starts
+    ])
+
+
 @app.route('/api/db-status')
 def api_db_status():
     """API endpoint for MongoDB connection status"""
@@ -944,5 +688,6 @@ def api_strategy_evolution():
 if __name__ == '__main__':
     print("🌐 Starting Flask dashboard server...")
     print("📊 Dashboard available at http://localhost:5000")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    print("   (development server; use gunicorn -c gunicorn_conf.py app:app in production)")
+    app.run(debug=os.getenv("FLASK_DEBUG") == "1", host='0.0.0.0', port=5000, threaded=True)
 
@@ -1,8 +1,35 @@
 """Arbitrage detection and bet sizing logic"""
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
+from functools import lru_cache
+from pymongo import UpdateOne
 from config import get_db
 from models import create_arbitrage_opportunity_doc
+from categories import categorize_event
+
+# Quote characters dropped when matching event names across platforms
+_QUOTES = str.maketrans("", "", "'\"")
+
+
+@lru_cache(maxsize=8192)
+def normalize_event_name(name: str) -> str:
+    """Normalize event name for matching (cached; markets are re-listed every poll)"""
+    return name.lower().strip().translate(_QUOTES)
+
+
+def _direction(yes_price: float, no_price: float, total_investment: float) -> Optional[Tuple]:
+    """(bet_yes, bet_no, payout, combined) for buying both sides, or None if it costs >= 1"""
+    combined = yes_price + no_price
+    if combined >= 1.0:
+        return None
+    # Sizing both bets in proportion to their prices pays out the same either
+    # way: bet_yes / yes_price == bet_no / no_price == total / combined
+    return (
+        total_investment * yes_price / combined,
+        total_investment * no_price / combined,
+        total_investment / combined,
+        combined
+    )
 
 
 def calculate_arbitrage(yes_price_a: float, no_price_b: float, 
@@ -22,73 +49,36 @@ def calculate_arbitrage(yes_price_a: float, no_price_b: float,
         Dict with arbitrage details or None if no arbitrage
         Note: platform_a and platform_b will be set by caller
     """
-    # Check both directions: A yes + B no, and B yes + A no
-    
-    # Direction 1: Bet Yes on A, No on B
-    combined_prob_1 = yes_price_a + no_price_b
-    profit_1 = None
-    bet_a_1 = None
-    bet_b_1 = None
-    if combined_prob_1 < 1.0:
-        # Guaranteed profit
-        # If we bet $X on A Yes and $Y on B No:
-        # X / yes_price_a = Y / no_price_b = payout
-        # X + Y = total_investment
-        # Solving: X = total_investment * yes_price_a / (yes_price_a + no_price_b)
-        bet_a_1 = total_investment * yes_price_a / combined_prob_1
-        bet_b_1 = total_investment * no_price_b / combined_prob_1
-        payout = bet_a_1 / yes_price_a
-        profit_1 = payout - total_investment
-        profit_pct_1 = (profit_1 / total_investment) * 100
+    # Direction 1: Bet Yes on A, No on B. Direction 2: Bet Yes on B, No on A
+    direction_1 = _direction(yes_price_a, no_price_b, total_investment)
+    direction_2 = _direction(yes_price_b, no_price_a, total_investment)
+    
+    # The cheaper combination is the more profitable one
+    if direction_1 is not None and (direction_2 is None or direction_1[3] < direction_2[3]):
+        yes_price, no_price = yes_price_a, no_price_b
+        bet_yes, bet_no, payout, combined = direction_1
+    elif direction_2 is not None:
+        yes_price, no_price = yes_price_b, no_price_a
+        bet_yes, bet_no, payout, combined = direction_2
     else:
-        profit_pct_1 = None
-    
-    # Direction 2: Bet Yes on B, No on A
-    combined_prob_2 = yes_price_b + no_price_a
-    profit_2 = None
-    bet_b_2 = None
-    bet_a_2 = None
-    if combined_prob_2 < 1.0:
-        bet_b_2 = total_investment * yes_price_b / combined_prob_2
-        bet_a_2 = total_investment * no_price_a / combined_prob_2
-        payout = bet_b_2 / yes_price_b
-        profit_2 = payout - total_investment
-        profit_pct_2 = (profit_2 / total_investment) * 100
-    else:
-        profit_pct_2 = None
-    
-    # Choose the better arbitrage opportunity
-    # Note: platform_a and platform_b will be set by the caller based on actual platforms
-    if profit_pct_1 is not None and (profit_pct_2 is None or profit_pct_1 > profit_pct_2):
-        return {
-            "platform_a_outcome": "yes",
-            "platform_a_price": yes_price_a,
-            "platform_b_outcome": "no",
-            "platform_b_price": no_price_b,
-            "bet_amount_a": round(bet_a_1, 2),
-            "bet_amount_b": round(bet_b_1, 2),
-            "total_investment": total_investment,
-            "guaranteed_payout": round(bet_a_1 / yes_price_a, 2),
-            "profit": round(profit_1, 2),
-            "profit_percentage": round(profit_pct_1, 4),
-            "combined_probability": round(combined_prob_1, 4)
-        }
-    elif profit_pct_2 is not None:
-        return {
-            "platform_a_outcome": "yes",
-            "platform_a_price": yes_price_b,
-            "platform_b_outcome": "no",
-            "platform_b_price": no_price_a,
-            "bet_amount_a": round(bet_b_2, 2),
-            "bet_amount_b": round(bet_a_2, 2),
-            "total_investment": total_investment,
-            "guaranteed_payout": round(bet_b_2 / yes_price_b, 2),
-            "profit": round(profit_2, 2),
-            "profit_percentage": round(profit_pct_2, 4),
-            "combined_probability": round(combined_prob_2, 4)
-        }
-    
-    return None
+        return None
+    
+    # Note: platform_a and platform_b will be set by the caller based on
+    # which direction was chosen; the yes side is always reported as A
+    profit = payout - total_investment
+    return {
+        "platform_a_outcome": "yes",
+        "platform_a_price": yes_price,
+        "platform_b_outcome": "no",
+        "platform_b_price": no_price,
+        "bet_amount_a": round(bet_yes, 2),
+        "bet_amount_b": round(bet_no, 2),
+        "total_investment": total_investment,
+        "guaranteed_payout": round(payout, 2),
+        "profit": round(profit, 2),
+        "profit_percentage": round(profit / total_investment * 100, 4),
+        "combined_probability": round(combined, 4)
+    }
 
 
 def find_arbitrage_opportunities(polymarket_prices: List[Dict], 
@@ -106,53 +96,46 @@ def find_arbitrage_opportunities(polymarket_prices: List[Dict],
     opportunities = []
     
     # Create lookup by event name (normalized)
-    def normalize_name(name: str) -> str:
-        """Normalize event name for matching"""
-        return name.lower().strip().replace("'", "").replace('"', "")
-    
-    kalshi_lookup = {normalize_name(p["event_name"]): p for p in kalshi_prices}
+    kalshi_lookup = {normalize_event_name(p["event_name"]): p for p in kalshi_prices}
     
     # Match Polymarket events with Kalshi events
     for pm_market in polymarket_prices:
-        normalized_name = normalize_name(pm_market["event_name"])
+        kalshi_market = kalshi_lookup.get(normalize_event_name(pm_market["event_name"]))
+        if kalshi_market is None:
+            continue
         
-        if normalized_name in kalshi_lookup:
-            kalshi_market = kalshi_lookup[normalized_name]
-            
-            # Check for arbitrage
-            arb = calculate_arbitrage(
-                yes_price_a=pm_market["yes_price"],
-                no_price_b=kalshi_market["no_price"],
-                yes_price_b=kalshi_market["yes_price"],
-                no_price_a=pm_market["no_price"]
-            )
+        # Combined cost of each direction; only a pair costing under 1.0 can
+        # be an arbitrage, so most matches are rejected without building one
+        pm_yes_kalshi_no = pm_market["yes_price"] + kalshi_market["no_price"]
+        kalshi_yes_pm_no = kalshi_market["yes_price"] + pm_market["no_price"]
+        if pm_yes_kalshi_no >= 1.0 and kalshi_yes_pm_no >= 1.0:
+            continue
+        
+        # Check for arbitrage
+        arb = calculate_arbitrage(
+            yes_price_a=pm_market["yes_price"],
+            no_price_b=kalshi_market["no_price"],
+            yes_price_b=kalshi_market["yes_price"],
+            no_price_a=pm_market["no_price"]
+        )
+        
+        if arb and arb["profit_percentage"] > 0:
+            # The cheaper direction is the more profitable one, which is the
+            # one calculate_arbitrage picked
+            if pm_yes_kalshi_no < kalshi_yes_pm_no:
+                # Direction 1: Bet Yes on Polymarket, No on Kalshi
+                arb["platform_a"] = "polymarket"
+                arb["platform_b"] = "kalshi"
+            else:
+                # Direction 2: Bet Yes on Kalshi, No on Polymarket
+                # (bet_amount_a already goes to Kalshi Yes, bet_amount_b to PM No)
+                arb["platform_a"] = "kalshi"
+                arb["platform_b"] = "polymarket"
+            arb["platform_a_outcome"] = "yes"
+            arb["platform_b_outcome"] = "no"
             
-            if arb and arb["profit_percentage"] > 0:
-                # Determine which platform is which based on which direction was better
-                # Check if direction 1 (PM yes + Kalshi no) or direction 2 (Kalshi yes + PM no) was better
-                # Direction 1: arb["platform_a_price"] == pm_market["yes_price"]
-                # Direction 2: arb["platform_a_price"] == kalshi_market["yes_price"]
-                
-                # If platform_a_price matches PM yes price, then direction 1 was chosen
-                if abs(arb["platform_a_price"] - pm_market["yes_price"]) < 0.001:
-                    # Direction 1: Bet Yes on Polymarket, No on Kalshi
-                    arb["platform_a"] = "polymarket"
-                    arb["platform_b"] = "kalshi"
-                    arb["platform_a_outcome"] = "yes"
-                    arb["platform_b_outcome"] = "no"
-                    # bet_amount_a already goes to platform_a (PM), bet_amount_b to platform_b (Kalshi) - correct!
-                else:
-                    # Direction 2: Bet Yes on Kalshi, No on Polymarket
-                    arb["platform_a"] = "kalshi"
-                    arb["platform_b"] = "polymarket"
-                    arb["platform_a_outcome"] = "yes"
-                    arb["platform_b_outcome"] = "no"
-                    # In calculate_arbitrage for direction 2, bet_amount_a = bet_b_2 (goes to Kalshi Yes) ✓
-                    # and bet_amount_b = bet_a_2 (goes to PM No) ✓
-                    # So the bet amounts are already correct for this platform assignment!
-                
-                arb["event_name"] = pm_market["event_name"]  # Use original name
-                opportunities.append(arb)
+            arb["event_name"] = pm_market["event_name"]  # Use original name
+            opportunities.append(arb)
     
     return opportunities
 
@@ -161,14 +144,11 @@ def store_arbitrage_opportunities(opportunities: List[Dict]):
     """Store arbitrage opportunities in MongoDB"""
     db = get_db()
     
-    # First, mark old opportunities as expired (older than 5 minutes)
-    cutoff_time = datetime.utcnow() - timedelta(minutes=5)
-    db.arbitrage_opportunities.update_many(
-        {"status": "active", "detected_at": {"$lt": cutoff_time}},
-        {"$set": {"status": "expired"}}
-    )
+    # Opportunities go stale by age (see get_active_opportunities) and are
+    # deleted by the detected_at TTL index, so nothing is expired here
     
-    # Store new opportunities
+    # Store new opportunities in one round-trip
+    ops = []
     for opp in opportunities:
         doc = create_arbitrage_opportunity_doc(
             event_name=opp["event_name"],
@@ -178,48 +158,53 @@ def store_arbitrage_opportunities(opportunities: List[Dict]):
             platform_b_price=opp["platform_b_price"],
             profit_percentage=opp["profit_percentage"],
             bet_amount_a=opp["bet_amount_a"],
-            bet_amount_b=opp["bet_amount_b"]
+            bet_amount_b=opp["bet_amount_b"],
+            category=categorize_event(opp["event_name"]),
+            profit=opp.get("profit")
         )
         
         # Update or insert
-        db.arbitrage_opportunities.update_one(
+        ops.append(UpdateOne(
             {"opportunity_id": doc["opportunity_id"]},
             {"$set": doc},
             upsert=True
-        )
+        ))
+    
+    if ops:
+        db.arbitrage_opportunities.bulk_write(ops, ordered=False)
+
+
+# Fields the dashboard reads from an opportunity
+OPPORTUNITY_PROJECTION = {
+    "event_name": 1,
+    "category": 1,
+    "platform_a": 1,
+    "platform_b": 1,
+    "platform_a_price": 1,
+    "platform_b_price": 1,
+    "bet_amount_a": 1,
+    "bet_amount_b": 1,
+    "profit": 1,
+    "profit_percentage": 1,
+    "expiration_date": 1,
+    "detected_at": 1
+}
 
 
-def get_active_opportunities(limit: int = 50) -> List[Dict]:
-    """Get active arbitrage opportunities"""
+def get_active_opportunities(limit: int = 50, category: Optional[str] = None) -> List[Dict]:
+    """Get active arbitrage opportunities, optionally only those in one category"""
     db = get_db()
     cutoff_time = datetime.utcnow() - timedelta(minutes=5)
     
-    opportunities = list(db.arbitrage_opportunities.find({
-        "status": "active",
-        "detected_at": {"$gte": cutoff_time}
-    }).sort("profit_percentage", -1).limit(limit))
+    match = {"detected_at": {"$gte": cutoff_time}}
+    if category:
+        match["category"] = category
     
-    # Convert ObjectId to string for JSON serialization and ensure all fields exist
-    for opp in opportunities:
-        opp["_id"] = str(opp["_id"])
-        opp["detected_at"] = opp["detected_at"].isoformat()
-        
-        # Ensure profit field exists
-        if "profit" not in opp or opp.get("profit") == 0:
-            total_investment = opp.get("bet_amount_a", 0) + opp.get("bet_amount_b", 0)
-            profit_pct = opp.get("profit_percentage", 0) / 100
-            if profit_pct > 0:
-                opp["profit"] = round(total_investment * profit_pct / (1 + profit_pct), 2)
-            else:
-                opp["profit"] = 0
-        
-        # Ensure expiration_date is properly formatted
-        if "expiration_date" in opp and isinstance(opp["expiration_date"], datetime):
-            opp["expiration_date"] = opp["expiration_date"].isoformat()
-        elif "expiration_date" not in opp:
-            # Set a default expiration (30 days from now)
-            default_exp = datetime.utcnow() + timedelta(days=30)
-            opp["expiration_date"] = default_exp.isoformat()
-    
-    return opportunities
+    # Documents are complete when stored, so they go out as read
+    return list(
+        db.arbitrage_opportunities.find(match, OPPORTUNITY_PROJECTION)
+        .sort("profit_percentage", -1)
+        .limit(limit)
+        .batch_size(limit)
+    )
 
@@ -0,0 +1,32 @@
+"""Event categories shared by the detector, position tracking and demo data"""
+import re
+from functools import lru_cache
+
+# Category keywords in priority order: an event matching several categories
+# is assigned the first one
+CATEGORY_KEYWORDS = {
+    'Politics': ['election', 'president', 'senate', 'house', 'republican', 'democratic', 'midterm'],
+    'Sports': ['nba', 'nfl', 'super bowl', 'championship', 'world cup', 'warriors', 'lakers', 'chiefs'],
+    'Crypto': ['bitcoin', 'ethereum', 'crypto', 'blockchain'],
+    'Economic': ['fed', 'rate', 'recession', 'inflation', 'unemployment', 's&p', 'gold', 'dollar'],
+    'Tech': ['ai', 'gpt', 'openai', 'tesla', 'apple', 'google', 'amazon', 'spacex', 'quantum'],
+}
+
+
+def _compile_category_pattern():
+    """Compile one regex with a lookahead branch per category, in priority order"""
+    branches = (
+        f"(?=.*?(?:{'|'.join(map(re.escape, keywords))}))(?P<{category}>)"
+        for category, keywords in CATEGORY_KEYWORDS.items()
+    )
+    return re.compile("|".join(branches), re.IGNORECASE | re.DOTALL)
+
+
+CATEGORY_PATTERN = _compile_category_pattern()
+
+
+@lru_cache(maxsize=4096)
+def categorize_event(event_name):
+    """Categorize event by keywords (cached; event names repeat across snapshots)"""
+    match = CATEGORY_PATTERN.match(event_name)
+    return match.lastgroup if match else 'Other'
@@ -1,5 +1,6 @@
 """Configuration and MongoDB connection setup"""
 import os
+import threading
 from dotenv import load_dotenv
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
@@ -31,19 +32,32 @@ if not KALSHI_API_SECRET or (KALSHI_API_SECRET and not KALSHI_API_SECRET.startsw
 
 # Agent configuration
 POLL_INTERVAL_SECONDS = 60
+PRICE_BUCKET_SECONDS = 60  # One stored snapshot per market/outcome per bucket
+OPPORTUNITY_TTL_SECONDS = 7 * 24 * 3600  # MongoDB deletes opportunities this long after detection
+
+# MongoDB connection pool: keep a few warm connections for the dashboard's
+# bursts and let idle ones close instead of reconnecting under load
+MONGO_MAX_POOL_SIZE = 20
+MONGO_MIN_POOL_SIZE = 5
+MONGO_MAX_IDLE_TIME_MS = 60000
 
 # MongoDB client
 _client = None
 _db = None
+# Threaded servers can hit the first get_db() concurrently; connect and
+# create indexes only once
+_init_lock = threading.RLock()
 
 
 def get_db():
     """Get MongoDB database instance"""
     global _db
     if _db is None:
-        client = get_client()
-        _db = client[DATABASE_NAME]
-        _setup_indexes(_db)
+        with _init_lock:
+            if _db is None:
+                db = get_client()[DATABASE_NAME]
+                _setup_indexes(db)
+                _db = db
     return _db
 
 
@@ -51,34 +65,66 @@ def get_client():
     """Get MongoDB client instance"""
     global _client
     if _client is None:
-        try:
-            _client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
-            # Test connection
-            _client.admin.command('ping')
-            print("✅ Connected to MongoDB successfully")
-        except ConnectionFailure as e:
-            print(f"❌ Failed to connect to MongoDB: {e}")
-            raise
+        with _init_lock:
+            if _client is None:
+                _client = _connect()
     return _client
 
 
+def _connect():
+    """Create the MongoClient and check the server is reachable"""
+    try:
+        client = MongoClient(
+            MONGODB_URI,
+            serverSelectionTimeoutMS=5000,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS
+        )
+        # Test connection
+        client.admin.command('ping')
+        print("✅ Connected to MongoDB successfully")
+        return client
+    except ConnectionFailure as e:
+        print(f"❌ Failed to connect to MongoDB: {e}")
+        raise
+
+
 def _setup_indexes(db):
     """Create indexes for better query performance"""
     # Market prices indexes
     db.market_prices.create_index([("market_id", 1), ("platform", 1), ("timestamp", -1)])
     db.market_prices.create_index([("event_name", 1), ("timestamp", -1)])
     db.market_prices.create_index([("timestamp", -1)])
+    # Covers the dashboard's latest-price-per-outcome aggregation
+    db.market_prices.create_index([
+        ("timestamp", -1), ("event_name", 1), ("platform", 1), ("outcome", 1), ("price", 1)
+    ])
+    db.market_prices.create_index(
+        [("market_id", 1), ("platform", 1), ("outcome", 1), ("bucket", 1)],
+        unique=True,
+        name="uniq_price",
+        # Older snapshots predate the bucket field
+        partialFilterExpression={"bucket": {"$exists": True}},
+    )
     
     # Arbitrage opportunities indexes
     db.arbitrage_opportunities.create_index([("opportunity_id", 1)], unique=True)
-    db.arbitrage_opportunities.create_index([("status", 1), ("detected_at", -1)])
-    db.arbitrage_opportunities.create_index([("detected_at", -1)])
+    # "Active" means detected within the last few minutes; the TTL index also
+    # serves those range scans. The profit_percentage sort is left to the
+    # server: it only ever sees a few minutes of opportunities, whereas a
+    # profit-ordered index would walk the whole retention window
+    db.arbitrage_opportunities.create_index(
+        [("detected_at", 1)], expireAfterSeconds=OPPORTUNITY_TTL_SECONDS
+    )
+    db.arbitrage_opportunities.create_index([("category", 1), ("detected_at", -1)])
     
     # Positions indexes
     db.positions.create_index([("position_id", 1)], unique=True)
     db.positions.create_index([("created_at", -1)])
     db.positions.create_index([("state", 1), ("last_checked", -1)])
     db.positions.create_index([("expiration_date", 1)])
+    db.positions.create_index([("state", 1), ("expiration_date", 1)])
     
     # Task log indexes
     db.task_log.create_index([("timestamp", -1)])
@@ -1,12 +1,16 @@
 """Generate dummy data for demo purposes"""
 import random
+import zlib
 from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from config import get_db
 from models import (
     create_market_price_doc,
     create_arbitrage_opportunity_doc,
     create_position_doc
 )
+from categories import categorize_event
 
 # Sample event names for realistic demo - 2026-2028 forward-looking markets
 POLITICAL_EVENTS = [
@@ -53,23 +57,7 @@ ECONOMIC_EVENTS = [
     "Will the dollar index fall below 100 in 2026?",
 ]
 
-SAMPLE_EVENTS = POLITICAL_EVENTS + SPORTS_EVENTS + TECH_EVENTS + ECONOMIC_EVENTS
-
-
-def categorize_event(event_name):
-    """Categorize event by keywords"""
-    event_lower = event_name.lower()
-    if any(word in event_lower for word in ['election', 'president', 'senate', 'house', 'republican', 'democratic', 'midterm']):
-        return 'Politics'
-    elif any(word in event_lower for word in ['nba', 'nfl', 'super bowl', 'championship', 'world cup', 'warriors', 'lakers', 'chiefs']):
-        return 'Sports'
-    elif any(word in event_lower for word in ['bitcoin', 'ethereum', 'crypto', 'blockchain']):
-        return 'Crypto'
-    elif any(word in event_lower for word in ['fed', 'rate', 'recession', 'inflation', 'unemployment', 's&p', 'gold', 'dollar']):
-        return 'Economic'
-    elif any(word in event_lower for word in ['ai', 'gpt', 'openai', 'tesla', 'apple', 'google', 'amazon', 'spacex', 'quantum']):
-        return 'Tech'
-    return 'Other'
+SAMPLE_EVENTS = (*POLITICAL_EVENTS, *SPORTS_EVENTS, *TECH_EVENTS, *ECONOMIC_EVENTS)
 
 
 def generate_dummy_market_prices(num_events=20):
@@ -89,74 +77,86 @@ def generate_dummy_market_prices(num_events=20):
     # Fill remaining slots randomly
     remaining = num_events - len(events)
     if remaining > 0:
-        all_events = list(set(SAMPLE_EVENTS) - set(events))
-        events.extend(random.sample(all_events, min(remaining, len(all_events))))
+        chosen = set(events)
+        unused = [e for e in SAMPLE_EVENTS if e not in chosen]
+        events.extend(random.sample(unused, min(remaining, len(unused))))
     
     events = events[:num_events]
-    docs = []
     
-    # Generate expiration dates (7-365 days from now)
+    # One snapshot time for every price; also the base for expiration dates
     base_date = datetime.utcnow()
     
-    for event_name in events:
-        # Generate slightly different prices on each platform to create arbitrage opportunities
-        # Polymarket prices
-        pm_yes = round(random.uniform(0.40, 0.60), 4)
-        pm_no = round(1.0 - pm_yes, 4)
-        
-        # Kalshi prices (different from Polymarket to create arbs)
-        kalshi_yes = round(random.uniform(0.40, 0.60), 4)
-        kalshi_no = round(1.0 - kalshi_yes, 4)
-        
-        # Create market IDs
-        pm_market_id = f"pm_{hash(event_name) % 100000}"
-        kalshi_market_id = f"kal_{hash(event_name) % 100000}"
-        
-        # Generate expiration date (7-365 days from now)
-        days_until_expiry = random.randint(7, 365)
-        expiration_date = base_date + timedelta(days=days_until_expiry)
-        
-        # Store Polymarket prices
-        docs.append(create_market_price_doc(
-            market_id=pm_market_id,
-            platform="polymarket",
-            event_name=event_name,
-            outcome="yes",
-            price=pm_yes
-        ))
-        docs.append(create_market_price_doc(
-            market_id=pm_market_id,
-            platform="polymarket",
-            event_name=event_name,
-            outcome="no",
-            price=pm_no
-        ))
-        
-        # Store Kalshi prices
-        docs.append(create_market_price_doc(
-            market_id=kalshi_market_id,
-            platform="kalshi",
-            event_name=event_name,
-            outcome="yes",
-            price=kalshi_yes
-        ))
-        docs.append(create_market_price_doc(
-            market_id=kalshi_market_id,
-            platform="kalshi",
-            event_name=event_name,
-            outcome="no",
-            price=kalshi_no
-        ))
+    def price_docs():
+        """Yield the four price documents (yes/no on each platform) per event"""
+        for event_name in events:
+            # Generate slightly different prices on each platform to create arbitrage opportunities
+            # Polymarket prices
+            pm_yes = round(random.uniform(0.40, 0.60), 4)
+            pm_no = round(1.0 - pm_yes, 4)
+            
+            # Kalshi prices (different from Polymarket to create arbs)
+            kalshi_yes = round(random.uniform(0.40, 0.60), 4)
+            kalshi_no = round(1.0 - kalshi_yes, 4)
+            
+            # Create market IDs (crc32 is stable across runs, unlike the
+            # per-process salted hash(), so reruns hit the same documents)
+            event_key = zlib.crc32(event_name.encode()) % 100000
+            pm_market_id = f"pm_{event_key}"
+            kalshi_market_id = f"kal_{event_key}"
+            
+            # Generate expiration date (7-365 days from now)
+            days_until_expiry = random.randint(7, 365)
+            expiration_date = base_date + timedelta(days=days_until_expiry)
+            
+            # Store Polymarket prices
+            yield create_market_price_doc(
+                market_id=pm_market_id,
+                platform="polymarket",
+                event_name=event_name,
+                outcome="yes",
+                price=pm_yes,
+                timestamp=base_date
+            )
+            yield create_market_price_doc(
+                market_id=pm_market_id,
+                platform="polymarket",
+                event_name=event_name,
+                outcome="no",
+                price=pm_no,
+                timestamp=base_date
+            )
+            
+            # Store Kalshi prices
+            yield create_market_price_doc(
+                market_id=kalshi_market_id,
+                platform="kalshi",
+                event_name=event_name,
+                outcome="yes",
+                price=kalshi_yes,
+                timestamp=base_date
+            )
+            yield create_market_price_doc(
+                market_id=kalshi_market_id,
+                platform="kalshi",
+                event_name=event_name,
+                outcome="no",
+                price=kalshi_no,
+                timestamp=base_date
+            )
     
     try:
-        result = db.market_prices.insert_many(docs, ordered=False)
+        result = db.market_prices.insert_many(price_docs(), ordered=False)
         print(f"✅ Inserted {len(result.inserted_ids)} price records")
         return events
-    except Exception as e:
-        if "duplicate" in str(e).lower():
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", ())
+        if all(we.get("code") == 11000 for we in write_errors):
             print(f"⚠️ Some prices already exist (duplicate keys)")
         else:
-            print(f"❌ Error inserting prices: {e}")
+            print(f"❌ Error inserting prices: {len(write_errors)} write errors")
+        return events
+    except Exception as e:
+        print(f"❌ Error inserting prices: {e}")
         return events
 
 
@@ -206,57 +206,44 @@ def generate_dummy_arbitrage_opportunities(events):
                 platform_b_price=kalshi_no,
                 profit_percentage=round(profit_pct, 4),
                 bet_amount_a=bet_a,
-                bet_amount_b=bet_b
+                bet_amount_b=bet_b,
+                category=categorize_event(event_name),
+                profit=profit_dollars,
+                expiration_date=expiration_date
             )
-            # Add profit and expiration date
-            opp["profit"] = profit_dollars
-            opp["expiration_date"] = expiration_date
             opp["days_until_expiry"] = days_until_expiry
             opportunities.append(opp)
     
-    # Insert opportunities
+    # Insert opportunities in one round-trip
+    ops = [
+        UpdateOne({"opportunity_id": opp["opportunity_id"]}, {"$set": opp}, upsert=True)
+        for opp in opportunities
+    ]
     inserted = 0
-    for opp in opportunities:
+    if ops:
         try:
-            db.arbitrage_opportunities.update_one(
-                {"opportunity_id": opp["opportunity_id"]},
-                {"$set": opp},
-                upsert=True
-            )
-            inserted += 1
+            result = db.arbitrage_opportunities.bulk_write(ops, ordered=False)
+            inserted = result.upserted_count + result.modified_count
+        except BulkWriteError as e:
+            # Unordered: everything but the failed ops was written
+            inserted = e.details.get("nUpserted", 0) + e.details.get("nModified", 0)
+            write_errors = e.details.get("writeErrors", ())
+            failed = ", ".join(opportunities[we["index"]]["opportunity_id"] for we in write_errors)
+            print(f"⚠️ {len(write_errors)} opportunities failed to insert ({failed}): "
+                  f"{write_errors[0].get('errmsg') if write_errors else ''}")
         except Exception as e:
-            print(f"⚠️ Error inserting opportunity: {e}")
+            print(f"⚠️ Error inserting opportunities: {e}")
     
     print(f"✅ Created {inserted} arbitrage opportunities")
     return opportunities
 
 
-def clear_old_data():
-    """Clear old dummy data (optional)"""
-    db = get_db()
-    print("🧹 Clearing old data...")
-    
-    # Clear market prices (optional - comment out if you want to keep data)
-    # db.market_prices.delete_many({"platform": {"$in": ["polymarket", "kalshi"]}})
-    
-    # Mark old opportunities as expired
-    cutoff = datetime.utcnow() - timedelta(hours=1)
-    result = db.arbitrage_opportunities.update_many(
-        {"status": "active", "detected_at": {"$lt": cutoff}},
-        {"$set": {"status": "expired"}}
-    )
-    print(f"   Marked {result.modified_count} old opportunities as expired")
-
-
 def main():
     """Main function to generate all dummy data"""
     print("=" * 60)
     print("🎲 Generating Dummy Data for Demo")
     print("=" * 60)
     
-    # Clear old data (optional)
-    clear_old_data()
-    
     # Generate market prices
     events = generate_dummy_market_prices(num_events=12)
     
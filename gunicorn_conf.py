@@ -0,0 +1,14 @@
+"""Gunicorn settings for serving the dashboard: gunicorn -c gunicorn_conf.py app:app"""
+import os
+
+bind = os.getenv("DASHBOARD_BIND", "0.0.0.0:5000")
+
+# Request handling is dominated by blocking MongoDB calls, so a few
+# processes with a thread pool each scale well. Every open /api/stream
+# connection holds one thread for as long as the tab stays open, so app.py
+# caps streams at DASHBOARD_MAX_STREAMS per worker (default: half of
+# DASHBOARD_THREADS); tabs past the cap poll instead of streaming.
+workers = int(os.getenv("DASHBOARD_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.getenv("DASHBOARD_THREADS", "8"))
+keepalive = 30
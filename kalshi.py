@@ -1,5 +1,8 @@
 """Kalshi API client"""
+import logging
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import base64
 import hmac
@@ -9,6 +12,32 @@ from typing import List, Dict, Optional
 from datetime import datetime
 from config import KALSHI_API_URL, KALSHI_API_KEY, KALSHI_API_SECRET
 
+log = logging.getLogger("kalshi")
+
+# Market fields to try, in order, since Kalshi responses vary in naming
+_MARKET_ID_KEYS = ("ticker", "market_id", "event_ticker")
+_EVENT_NAME_KEYS = ("title", "question", "subtitle", "event_ticker")
+_YES_PRICE_KEYS = ("yes_bid", "yes_price", "yes_bid_price")
+_NO_PRICE_KEYS = ("no_bid", "no_price", "no_bid_price")
+
+
+def _first_value(market: Dict, keys: tuple):
+    """First non-empty value among keys, or None"""
+    for key in keys:
+        value = market.get(key)
+        if value:
+            return value
+    return None
+
+
+def _first_price(market: Dict, keys: tuple):
+    """First value among keys that is set at all (0 is a valid price), or None"""
+    for key in keys:
+        value = market.get(key)
+        if value is not None:
+            return value
+    return None
+
 
 class KalshiClient:
     """Client for fetching data from Kalshi"""
@@ -18,30 +47,39 @@ class KalshiClient:
         self.api_key = KALSHI_API_KEY
         self.api_secret = KALSHI_API_SECRET
         self.session = requests.Session()
-        self.last_request_time = 0
+        # Keep-alive pool so each poll reuses the warmed TLS connection;
+        # retries are handled by the agent, not urllib3
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.min_request_interval = 0.5
+        # Monotonic clock, so wall-clock jumps can't stall or skip the limit
+        self._next_allowed_at = 0.0
+        # The key is parsed once here; each request only signs
+        self._sign = self._load_signer()
     
     def _rate_limit(self):
         """Simple rate limiting"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
-        self.last_request_time = time.time()
+        now = time.monotonic()
+        delay = self._next_allowed_at - now
+        if delay > 0:
+            time.sleep(delay)
+        self._next_allowed_at = max(now, self._next_allowed_at) + self.min_request_interval
     
-    def _generate_signature(self, method: str, path: str, timestamp: str, body: str = "") -> str:
+    def _load_signer(self):
         """
-        Generate signature for Kalshi API authentication
+        Parse the signing key once and return a function that signs a message
         
         Kalshi uses RSA private key for signing. The secret should be either:
         1. A path to an RSA private key file (.pem)
         2. The RSA private key content itself
+        
+        Returns None if no credentials are configured or the key can't be loaded.
         """
         if not self.api_key or not self.api_secret:
-            return ""
+            return None
         
         try:
-            message = f"{timestamp}{method}{path}{body}".encode('utf-8')
-            
             # Check if api_secret is a file path or the key content
             if os.path.exists(self.api_secret):
                 # It's a file path
@@ -69,43 +107,39 @@ class KalshiClient:
                     password=None,
                     backend=default_backend()
                 )
-                
-                # Sign the message
-                signature = private_key.sign(
-                    message,
-                    padding.PKCS1v15(),
-                    hashes.SHA256()
-                )
-                return base64.b64encode(signature).decode('utf-8')
+                sign_padding = padding.PKCS1v15()
+                sign_hash = hashes.SHA256()
+                return lambda message: private_key.sign(message, sign_padding, sign_hash)
             except ImportError:
-                # Fallback: try using pycryptodome or pycrypto if available
-                try:
-                    from Crypto.PublicKey import RSA
-                    from Crypto.Signature import pkcs1_15
-                    from Crypto.Hash import SHA256
-                    
-                    key = RSA.import_key(key_content)
-                    h = SHA256.new(message)
-                    signature = pkcs1_15.new(key).sign(h)
-                    return base64.b64encode(signature).decode('utf-8')
-                except ImportError:
-                    # Last resort: use HMAC with a hash of the key (won't work for real auth)
-                    print("⚠️ Warning: cryptography library not installed. Install with: pip install cryptography")
-                    print("   Attempting HMAC fallback (may not work for actual authentication)")
-                    key_hash = hashlib.sha256(key_content.encode('utf-8')).digest()
-                    signature = hmac.new(key_hash[:32], message, hashlib.sha256).digest()
-                    return base64.b64encode(signature).decode('utf-8')
+                # Last resort: use HMAC with a hash of the key (won't work for real auth).
+                # hashlib is backed by OpenSSL, like cryptography
+                print("⚠️ Warning: cryptography library not installed. Install with: pip install cryptography")
+                print("   Attempting HMAC fallback (may not work for actual authentication)")
+                key_hash = hashlib.sha256(key_content.encode('utf-8')).digest()
+                return lambda message: hmac.new(key_hash[:32], message, hashlib.sha256).digest()
         except Exception as e:
-            print(f"⚠️ Warning: Kalshi signature generation failed: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("⚠️ Warning: Kalshi signing key could not be loaded: %s", e)
+            return None
+    
+    def _generate_signature(self, method: str, path: str, timestamp: str, body: str = "") -> str:
+        """Generate signature for Kalshi API authentication (empty if there is no usable key)"""
+        if self._sign is None:
+            return ""
+        
+        try:
+            message = f"{timestamp}{method}{path}{body}".encode('utf-8')
+            return base64.b64encode(self._sign(message)).decode('utf-8')
+        except Exception as e:
+            log.exception("⚠️ Warning: Kalshi signature generation failed: %s", e)
             return ""
     
-    def fetch_markets(self, limit: int = 100) -> List[Dict]:
+    def fetch_markets(self, limit: int = 100) -> Optional[List[Dict]]:
         """
         Fetch active markets from Kalshi
         
         Uses Kalshi REST API v2
+        
+        Returns None if the API could not be reached, [] if it returned no markets.
         """
         try:
             self._rate_limit()
@@ -135,16 +169,16 @@ class KalshiClient:
                         "KALSHI-ACCESS-TIMESTAMP": timestamp
                     })
             
-            response = self.session.get(url, params=params, headers=headers, timeout=10)
+            response = self.session.get(url, params=params, headers=headers, timeout=(3, 10))
             
             # If auth fails, try public endpoint
             if response.status_code == 401:
                 print("⚠️ Kalshi authentication failed, trying public endpoint...")
                 # Some endpoints might be public, try without auth
-                response = self.session.get(url, params=params, timeout=10)
+                response = self.session.get(url, params=params, timeout=(3, 10))
             
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             # Handle different possible response formats
             if isinstance(data, list):
@@ -160,8 +194,11 @@ class KalshiClient:
             print(f"❌ Error fetching Kalshi markets: {e}")
             if hasattr(e, 'response') and e.response is not None:
                 print(f"   Response: {e.response.text[:200]}")
-            # Return empty list on error
-            return []
+            # None (not []) so the caller knows to retry
+            return None
+        except orjson.JSONDecodeError as e:
+            print(f"❌ Error decoding Kalshi markets: {e}")
+            return None
     
     def parse_market_data(self, market: Dict) -> Optional[Dict]:
         """
@@ -175,28 +212,17 @@ class KalshiClient:
         } or None
         """
         try:
-            market_id = market.get("ticker") or market.get("market_id") or market.get("event_ticker", "")
+            market_id = _first_value(market, _MARKET_ID_KEYS)
             
             # Extract question/event name
-            event_name = (
-                market.get("title") or 
-                market.get("question") or 
-                market.get("subtitle") or 
-                market.get("event_ticker", "")
-            )
+            event_name = _first_value(market, _EVENT_NAME_KEYS)
             
             if not event_name or not market_id:
                 return None
             
             # Extract prices - Kalshi uses yes/no prices directly
-            yes_price = market.get("yes_bid", market.get("yes_price"))
-            no_price = market.get("no_bid", market.get("no_price"))
-            
-            # Try alternative field names
-            if yes_price is None:
-                yes_price = market.get("yes_bid_price")
-            if no_price is None:
-                no_price = market.get("no_bid_price")
+            yes_price = _first_price(market, _YES_PRICE_KEYS)
+            no_price = _first_price(market, _NO_PRICE_KEYS)
             
             # Convert to float if they're strings
             if isinstance(yes_price, str):
@@ -249,15 +275,10 @@ class KalshiClient:
             print(f"⚠️ Error parsing Kalshi market: {e}")
             return None
     
-    def get_all_market_prices(self, limit: int = 100) -> List[Dict]:
-        """Get all market prices in our standard format"""
+    def get_all_market_prices(self, limit: int = 100) -> Optional[List[Dict]]:
+        """Get all market prices in our standard format (None on network error)"""
         markets = self.fetch_markets(limit=limit)
-        prices = []
-        
-        for market in markets:
-            parsed = self.parse_market_data(market)
-            if parsed:
-                prices.append(parsed)
-        
-        return prices
+        if markets is None:
+            return None
+        return [parsed for parsed in map(self.parse_market_data, markets) if parsed]
 
@@ -1,31 +1,47 @@
 """MongoDB models and data structures"""
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 import uuid
+from config import PRICE_BUCKET_SECONDS
 
 
 def create_market_price_doc(market_id: str, platform: str, event_name: str, 
                             outcome: str, price: float, timestamp: Optional[datetime] = None):
     """Create a market price document"""
-    return {
-        "_id": f"{platform}_{market_id}_{outcome}_{int((timestamp or datetime.utcnow()).timestamp())}",
+    return stamp_market_price_doc({
         "market_id": market_id,
         "platform": platform,
         "event_name": event_name,
         "outcome": outcome,
-        "price": price,
-        "timestamp": timestamp or datetime.utcnow()
-    }
+        "price": price
+    }, timestamp or datetime.utcnow())
+
+
+def stamp_market_price_doc(doc: dict, timestamp: datetime):
+    """Set the snapshot time fields (_id, timestamp, bucket) on a market price document"""
+    epoch = int(timestamp.timestamp())
+    doc["_id"] = f"{doc['platform']}_{doc['market_id']}_{doc['outcome']}_{epoch}"
+    doc["timestamp"] = timestamp
+    doc["bucket"] = epoch // PRICE_BUCKET_SECONDS
+    return doc
 
 
 def create_arbitrage_opportunity_doc(event_name: str, platform_a: str, platform_a_price: float,
                                      platform_b: str, platform_b_price: float,
                                      profit_percentage: float, bet_amount_a: float,
-                                     bet_amount_b: float, opportunity_id: Optional[str] = None):
-    """Create an arbitrage opportunity document"""
+                                     bet_amount_b: float, opportunity_id: Optional[str] = None,
+                                     category: str = "Other", profit: Optional[float] = None,
+                                     expiration_date: Optional[datetime] = None):
+    """Create an arbitrage opportunity document with every field the dashboard reads"""
+    detected_at = datetime.utcnow()
+    opportunity_id = opportunity_id or uuid.uuid4().hex
+    if profit is None:
+        # profit_percentage is profit over the amount staked (payout - total)
+        pct = profit_percentage / 100
+        profit = round((bet_amount_a + bet_amount_b) * pct, 2) if pct > 0 else 0
     return {
-        "_id": opportunity_id or str(uuid.uuid4()),
-        "opportunity_id": opportunity_id or str(uuid.uuid4()),
+        "_id": opportunity_id,
+        "opportunity_id": opportunity_id,
         "event_name": event_name,
         "platform_a": platform_a,
         "platform_a_price": platform_a_price,
@@ -34,8 +50,10 @@ def create_arbitrage_opportunity_doc(event_name: str, platform_a: str, platform_
         "profit_percentage": profit_percentage,
         "bet_amount_a": bet_amount_a,
         "bet_amount_b": bet_amount_b,
-        "detected_at": datetime.utcnow(),
-        "status": "active"
+        "category": category,
+        "profit": profit,
+        "expiration_date": expiration_date or detected_at + timedelta(days=30),
+        "detected_at": detected_at
     }
 
 
@@ -45,9 +63,11 @@ def create_position_doc(event_name: str, platform_a: str, platform_b: str,
                         target_profit: float, expiration_date: datetime,
                         market_type: str, position_id: Optional[str] = None):
     """Create a multi-day position tracking document"""
+    position_id = position_id or uuid.uuid4().hex
+    now = datetime.utcnow()
     return {
-        "_id": position_id or str(uuid.uuid4()),
-        "position_id": position_id or str(uuid.uuid4()),
+        "_id": position_id,
+        "position_id": position_id,
         "event_name": event_name,
         "platform_a": platform_a,
         "platform_b": platform_b,
@@ -60,8 +80,8 @@ def create_position_doc(event_name: str, platform_a: str, platform_b: str,
         "market_type": market_type,
         "state": "watching",  # watching, entered, expired, profitable, loss
         "days_held": 0,
-        "created_at": datetime.utcnow(),
-        "last_checked": datetime.utcnow(),
+        "created_at": now,
+        "last_checked": now,
         "actual_profit": None,
         "resolved_at": None
     }
@@ -70,9 +90,10 @@ def create_position_doc(event_name: str, platform_a: str, platform_b: str,
 def create_task_log_doc(action: str, status: str, details: str = "",
                         error: Optional[str] = None, task_id: Optional[str] = None):
     """Create a task log entry for state persistence"""
+    task_id = task_id or uuid.uuid4().hex
     return {
-        "_id": task_id or str(uuid.uuid4()),
-        "task_id": task_id or str(uuid.uuid4()),
+        "_id": task_id,
+        "task_id": task_id,
         "action": action,  # detect, place_order, monitor, resolve, recover
         "status": status,  # success, failure, retry
         "details": details,
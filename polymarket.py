@@ -1,10 +1,178 @@
 """Polymarket API client"""
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+import threading
 import time
-from typing import List, Dict, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from cachetools import TTLCache
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from config import POLYMARKET_API_URL
 
+PARSE_CACHE_TTL_SECONDS = 60
+# How long Gamma gets to answer before the CLOB request is started as a hedge
+GAMMA_HEDGE_SECONDS = 2.0
+_MISSING = object()
+
+
+# Market fields to try, in order, for the id and the event name
+_MARKET_ID_KEYS = ("id", "market_id", "_id", "condition_id", "conditionId")
+_EVENT_NAME_KEYS = ("question", "title", "name", "description")
+
+# Outcome label -> True for Yes, False for No. The usual spellings hit
+# directly; anything else is lowercased (and stripped, for CLOB tokens)
+# before a second lookup
+_OUTCOME_SIDES = {
+    "Yes": True, "yes": True, "YES": True, "Y": True, "y": True,
+    "No": False, "no": False, "NO": False, "N": False, "n": False,
+}
+
+
+def _outcome_side(label: str, strip: bool = False) -> Optional[bool]:
+    """True for a Yes outcome label, False for No, None for anything else"""
+    side = _OUTCOME_SIDES.get(label)
+    if side is None:
+        label = label.lower()
+        side = _OUTCOME_SIDES.get(label.strip() if strip else label)
+    return side
+
+
+def _prices_from_outcome_prices(market: Dict, yes_price, no_price) -> Tuple:
+    """Format 1: Gamma API format with outcomePrices (JSON strings)"""
+    try:
+        prices = market.get("outcomePrices", "[]")
+        outcomes = market.get("outcomes", "[]")
+        if isinstance(prices, str):
+            prices = orjson.loads(prices)
+            outcomes = orjson.loads(outcomes) if isinstance(outcomes, str) else outcomes
+        
+        for price, outcome in zip(prices, outcomes):
+            price_val = float(price) if price else 0.0
+            side = _outcome_side(outcome)
+            if side is True:
+                yes_price = price_val
+            elif side is False:
+                no_price = price_val
+    except (orjson.JSONDecodeError, ValueError, IndexError):
+        pass
+    return yes_price, no_price
+
+
+def _prices_from_tokens(market: Dict, yes_price, no_price) -> Tuple:
+    """Format 2: CLOB API format with tokens array"""
+    tokens = market["tokens"]
+    if not isinstance(tokens, list):
+        return yes_price, no_price
+    
+    for token in tokens:
+        if isinstance(token, dict):
+            price = float(token.get("price", token.get("lastPrice", 0)))
+            side = _outcome_side(token.get("outcome", ""), strip=True)
+            if side is True:
+                yes_price = price
+            elif side is False:
+                no_price = price
+    
+    # If still no Yes/No but have exactly 2 tokens, use them as binary
+    if yes_price is None and no_price is None and len(tokens) == 2:
+        yes_price = float(tokens[0].get("price", 0))
+        no_price = float(tokens[1].get("price", 0))
+    return yes_price, no_price
+
+
+def _prices_from_outcomes(market: Dict, yes_price, no_price) -> Tuple:
+    """Format 3: Direct outcome arrays (if exists)"""
+    outcomes = market["outcomes"]
+    if isinstance(outcomes, list):
+        for outcome in outcomes:
+            if isinstance(outcome, dict):
+                side = _outcome_side(outcome.get("name", ""))
+                if side is True:
+                    yes_price = float(outcome.get("price", 0))
+                elif side is False:
+                    no_price = float(outcome.get("price", 0))
+    return yes_price, no_price
+
+
+def _prices_from_fields(market: Dict, yes_price, no_price) -> Tuple:
+    """Format 4: Direct price fields (replace anything found so far)"""
+    yes_price = market.get("yesPrice") or market.get("yes_price")
+    no_price = market.get("noPrice") or market.get("no_price")
+    return (
+        float(yes_price) if yes_price is not None else None,
+        float(no_price) if no_price is not None else None
+    )
+
+
+# Each format's marker key and extractor, tried in order until both prices
+# are known; the direct price fields need no marker. An extractor takes the
+# prices found so far and returns them with whatever it found added
+_PRICE_FORMATS = (
+    ("outcomePrices", _prices_from_outcome_prices),
+    ("tokens", _prices_from_tokens),
+    ("outcomes", _prices_from_outcomes),
+    (None, _prices_from_fields),
+)
+
+
+def _extract_prices(market: Dict) -> Tuple:
+    """(yes_price, no_price), either of which may be None if not found"""
+    yes_price = no_price = None
+    for marker, extract in _PRICE_FORMATS:
+        if yes_price is not None and no_price is not None:
+            break
+        if marker is None or marker in market:
+            yes_price, no_price = extract(market, yes_price, no_price)
+    return yes_price, no_price
+
+
+def _parse_cache_key(market) -> Optional[tuple]:
+    """
+    Cache key for a Gamma market, or None if it shouldn't be cached
+    
+    Gamma markets carry their prices and outcome labels as JSON strings, so
+    those raw strings, the resolved id and event name, and the update time
+    cover every field a complete outcomePrices parse reads. Fields only read
+    when outcomePrices lacks a side (tokens, yesPrice, ...) are not part of
+    the key; a change to them alone is picked up once the entry expires.
+    """
+    if not isinstance(market, dict):
+        return None
+    prices = market.get("outcomePrices")
+    outcomes = market.get("outcomes")
+    event_name = next(filter(None, map(market.get, _EVENT_NAME_KEYS)), "")
+    if not isinstance(prices, str) or not isinstance(event_name, str):
+        return None
+    if outcomes is not None and not isinstance(outcomes, str):
+        return None
+    market_id = next(filter(None, (str(market.get(key, "")) for key in _MARKET_ID_KEYS)), "")
+    return (market_id, event_name, market.get("updatedAt"), outcomes, prices)
+
+
+class TokenBucket:
+    """Rate limiter allowing bursts of up to capacity requests, rate per second on average"""
+    
+    def __init__(self, capacity: int, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Take a token, sleeping only for the deficit when the bucket is empty"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            # Going negative reserves a future token, so concurrent callers
+            # queue up one interval apart rather than all waking together
+            self.tokens -= 1
+            deficit = -self.tokens / self.rate
+        if deficit > 0:
+            time.sleep(deficit)
+
 
 class PolymarketClient:
     """Client for fetching data from Polymarket"""
@@ -12,116 +180,139 @@ class PolymarketClient:
     def __init__(self):
         self.base_url = POLYMARKET_API_URL
         self.session = requests.Session()
+        # Keep-alive pool so each poll reuses the warmed TLS connection;
+        # retries are handled by the agent, not urllib3
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.headers.update({
             "User-Agent": "ArbitrageHunter/1.0"
         })
-        self.last_request_time = 0
-        self.min_request_interval = 0.5  # Rate limiting: 0.5 seconds between requests
+        # Rate limiting: 2 requests/second on average, bursts of up to 5
+        self.bucket = TokenBucket(capacity=5, rate=2.0)
+        # Runs the Gamma request and, if it is slow, the CLOB hedge in fetch_markets
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="polymarket")
+        # Parsed Gamma markets; most are unchanged from one poll to the next
+        self._parsed_markets = TTLCache(maxsize=4096, ttl=PARSE_CACHE_TTL_SECONDS)
     
-    def _rate_limit(self):
-        """Simple rate limiting"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
-        self.last_request_time = time.time()
-    
-    def fetch_markets(self, limit: int = 100) -> List[Dict]:
+    def fetch_markets(self, limit: int = 100) -> Optional[List[Dict]]:
         """
         Fetch active markets from Polymarket
         
         Uses the CLOB API to get market information. For arbitrage, we want
         markets that are currently accepting orders, even if some are resolved.
+        
+        Returns None if the API could not be reached, [] if it returned no markets.
         """
         try:
-            self._rate_limit()
-            
-            # Try Gamma API first for better active market filtering
+            # Gamma has better active market filtering, so it is asked first;
+            # the CLOB API is only hit when Gamma fails or is still silent
+            # after GAMMA_HEDGE_SECONDS, and then whichever answers first wins
+            gamma_markets = self._executor.submit(self._fetch_gamma_markets, limit)
             try:
-                gamma_url = "https://gamma-api.polymarket.com/markets"
-                response = self.session.get(
-                    gamma_url, 
-                    params={"active": "true", "limit": limit * 2}, 
-                    timeout=15
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    if isinstance(data, list):
-                        return data[:limit]
-                    elif isinstance(data, dict) and "data" in data:
-                        return data["data"][:limit]
-            except:
-                pass  # Fall back to CLOB API
+                markets = gamma_markets.result(timeout=GAMMA_HEDGE_SECONDS)
+                if markets is not None:
+                    return markets
+            except FutureTimeout:
+                pass
+            clob_markets = self._executor.submit(self._fetch_clob_markets, limit)
+            wait((gamma_markets, clob_markets), return_when=FIRST_COMPLETED)
+            if gamma_markets.done() and gamma_markets.result() is not None:
+                return gamma_markets.result()
+            if clob_markets.exception() is not None and not gamma_markets.done():
+                # CLOB failed first; Gamma's late answer may still arrive
+                markets = gamma_markets.result()
+                if markets is not None:
+                    return markets
+            return clob_markets.result()
             
-            # Fallback: Use CLOB API
-            url = f"{self.base_url}/markets"
-            params = {"limit": min(limit * 3, 1000)}  # Fetch more to find active ones
-            
-            response = self.session.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Handle response format: {"data": [...], "next_cursor": "...", ...}
-            if isinstance(data, dict) and "data" in data:
-                all_markets = data["data"]
-            elif isinstance(data, list):
-                all_markets = data
-            else:
-                return []
-            
-            # Filter for markets that are accepting orders (currently tradeable)
-            # We'll accept markets that are active and accepting orders, even if closed
-            # (some markets may be resolved but still have orderbooks)
-            open_markets = []
-            for m in all_markets:
-                # Prioritize markets that are clearly open
-                if (m.get("active", False) 
-                    and not m.get("archived", False)
-                    and m.get("accepting_orders") is True):
-                    open_markets.append(m)
-                elif (m.get("active", False) 
-                      and not m.get("closed", False)
-                      and not m.get("archived", False)):
-                    # Also include active, non-closed markets
-                    open_markets.append(m)
-                    
-                if len(open_markets) >= limit:
-                    break
-            
-            # If we still don't have enough, relax further (for testing)
-            if len(open_markets) < limit // 2:
-                for m in all_markets:
-                    if (m.get("active", False) and not m.get("archived", False)
-                        and m not in open_markets):
-                        open_markets.append(m)
-                        if len(open_markets) >= limit:
-                            break
-            
-            return open_markets
-            
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             print(f"❌ Error fetching Polymarket markets: {e}")
             # Fallback: try alternative endpoint or return sample data for testing
             return self._fetch_markets_fallback()
     
-    def _fetch_markets_fallback(self) -> List[Dict]:
-        """Fallback method using Gamma API or sample data"""
+    def _fetch_gamma_markets(self, limit: int) -> Optional[List[Dict]]:
+        """Active markets from the Gamma API, or None if it didn't answer with any"""
+        try:
+            gamma_url = "https://gamma-api.polymarket.com/markets"
+            self.bucket.acquire()
+            response = self.session.get(
+                gamma_url, 
+                params={"active": "true", "limit": limit * 2}, 
+                timeout=(3, 15)
+            )
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                if isinstance(data, list):
+                    return data[:limit]
+                elif isinstance(data, dict) and "data" in data:
+                    return data["data"][:limit]
+        except:
+            pass  # Fall back to CLOB API
+        return None
+    
+    def _fetch_clob_markets(self, limit: int) -> List[Dict]:
+        """Open markets from the CLOB API (raises RequestException if unreachable)"""
+        url = f"{self.base_url}/markets"
+        params = {"limit": min(limit * 3, 1000)}  # Fetch more to find active ones
+        
+        self.bucket.acquire()
+        response = self.session.get(url, params=params, timeout=(3, 15))
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        
+        # Handle response format: {"data": [...], "next_cursor": "...", ...}
+        if isinstance(data, dict) and "data" in data:
+            all_markets = data["data"]
+        elif isinstance(data, list):
+            all_markets = data
+        else:
+            return []
+        
+        # Filter for markets that are accepting orders (currently tradeable)
+        # We'll accept markets that are active and accepting orders, even if closed
+        # (some markets may be resolved but still have orderbooks)
+        open_markets = []
+        added = set()  # id()s of markets already in open_markets
+        for m in all_markets:
+            # Active markets that are accepting orders, or at least not closed
+            if (m.get("active", False)
+                and not m.get("archived", False)
+                and (m.get("accepting_orders") is True or not m.get("closed", False))):
+                open_markets.append(m)
+                added.add(id(m))
+                if len(open_markets) >= limit:
+                    break
+        
+        # If we still don't have enough, relax further (for testing)
+        if len(open_markets) < limit // 2:
+            for m in all_markets:
+                if (m.get("active", False) and not m.get("archived", False)
+                    and id(m) not in added):
+                    open_markets.append(m)
+                    if len(open_markets) >= limit:
+                        break
+        
+        return open_markets
+    
+    def _fetch_markets_fallback(self) -> Optional[List[Dict]]:
+        """Fallback method using Gamma API"""
         try:
             # Try Gamma API as alternative
             gamma_url = "https://gamma-api.polymarket.com/markets"
-            self._rate_limit()
-            response = self.session.get(gamma_url, params={"active": "true"}, timeout=10)
+            self.bucket.acquire()
+            response = self.session.get(gamma_url, params={"active": "true"}, timeout=(3, 10))
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
             
             if isinstance(data, list):
                 return data[:100]
             elif isinstance(data, dict) and "data" in data:
                 return data["data"][:100]
+            return []
         except:
-            pass
-        
-        # Return empty list if all fails
-        return []
+            # Both endpoints unreachable - let the caller retry
+            return None
     
     def parse_market_data(self, market: Dict) -> Optional[Dict]:
         """
@@ -134,97 +325,35 @@ class PolymarketClient:
             'no_price': float
         } or None
         """
+        key = _parse_cache_key(market)
+        if key is None:
+            return self._parse_market_data(market)
+        
+        parsed = self._parsed_markets.get(key, _MISSING)
+        if parsed is _MISSING:
+            parsed = self._parse_market_data(market)
+            self._parsed_markets[key] = parsed
+        # Copy so callers can't alter the cached result
+        return dict(parsed) if parsed else parsed
+    
+    def _parse_market_data(self, market: Dict) -> Optional[Dict]:
+        """Uncached parse_market_data"""
         try:
             # Handle if market is a string (shouldn't happen, but be safe)
             if not isinstance(market, dict):
                 return None
             
             # Polymarket market structure varies, handle common formats
-            market_id = (
-                str(market.get("id", "")) or 
-                str(market.get("market_id", "")) or 
-                str(market.get("_id", "")) or
-                str(market.get("condition_id", "")) or
-                str(market.get("conditionId", ""))
-            )
+            market_id = next(filter(None, (str(market.get(key, "")) for key in _MARKET_ID_KEYS)), "")
             
             # Extract question/event name
-            event_name = (
-                market.get("question") or 
-                market.get("title") or 
-                market.get("name") or 
-                market.get("description", "")
-            )
+            event_name = next(filter(None, map(market.get, _EVENT_NAME_KEYS)), "")
             
             if not event_name or not market_id:
                 return None
             
             # Extract prices - Polymarket uses different formats
-            yes_price = None
-            no_price = None
-            
-            # Format 1: Gamma API format with outcomePrices (JSON strings)
-            if "outcomePrices" in market:
-                import json
-                try:
-                    prices_str = market.get("outcomePrices", "[]")
-                    outcomes_str = market.get("outcomes", "[]")
-                    if isinstance(prices_str, str):
-                        prices = json.loads(prices_str)
-                        outcomes = json.loads(outcomes_str) if isinstance(outcomes_str, str) else outcomes_str
-                    else:
-                        prices = prices_str
-                        outcomes = outcomes_str
-                    
-                    for i, outcome in enumerate(outcomes):
-                        if i < len(prices):
-                            price_val = float(prices[i]) if prices[i] else 0.0
-                            if outcome.lower() in ["yes", "y"]:
-                                yes_price = price_val
-                            elif outcome.lower() in ["no", "n"]:
-                                no_price = price_val
-                except (json.JSONDecodeError, ValueError, IndexError):
-                    pass
-            
-            # Format 2: CLOB API format with tokens array
-            if (yes_price is None or no_price is None) and "tokens" in market:
-                if isinstance(market["tokens"], list):
-                    for token in market["tokens"]:
-                        if isinstance(token, dict):
-                            outcome = token.get("outcome", "")
-                            price = float(token.get("price", token.get("lastPrice", 0)))
-                            
-                            outcome_lower = outcome.lower().strip()
-                            if outcome_lower in ["yes", "y"]:
-                                yes_price = price
-                            elif outcome_lower in ["no", "n"]:
-                                no_price = price
-                    
-                    # If still no Yes/No but have exactly 2 tokens, use them as binary
-                    if yes_price is None and no_price is None and len(market["tokens"]) == 2:
-                        yes_price = float(market["tokens"][0].get("price", 0))
-                        no_price = float(market["tokens"][1].get("price", 0))
-            
-            # Format 3: Direct outcome arrays (if exists)
-            if (yes_price is None or no_price is None) and "outcomes" in market:
-                outcomes = market["outcomes"]
-                if isinstance(outcomes, list):
-                    for outcome in outcomes:
-                        if isinstance(outcome, dict):
-                            if outcome.get("name", "").lower() in ["yes", "y"]:
-                                yes_price = float(outcome.get("price", 0))
-                            elif outcome.get("name", "").lower() in ["no", "n"]:
-                                no_price = float(outcome.get("price", 0))
-            
-            # Format 4: Direct price fields
-            if yes_price is None or no_price is None:
-                yes_price = market.get("yesPrice") or market.get("yes_price")
-                no_price = market.get("noPrice") or market.get("no_price")
-                
-                if yes_price is not None:
-                    yes_price = float(yes_price)
-                if no_price is not None:
-                    no_price = float(no_price)
+            yes_price, no_price = _extract_prices(market)
             
             # If still no prices, skip this market
             if yes_price is None or no_price is None:
@@ -249,15 +378,10 @@ class PolymarketClient:
             print(f"⚠️ Error parsing Polymarket market: {e}")
             return None
     
-    def get_all_market_prices(self, limit: int = 100) -> List[Dict]:
-        """Get all market prices in our standard format"""
+    def get_all_market_prices(self, limit: int = 100) -> Optional[List[Dict]]:
+        """Get all market prices in our standard format (None on network error)"""
         markets = self.fetch_markets(limit=limit)
-        prices = []
-        
-        for market in markets:
-            parsed = self.parse_market_data(market)
-            if parsed:
-                prices.append(parsed)
-        
-        return prices
+        if markets is None:
+            return None
+        return [parsed for parsed in map(self.parse_market_data, markets) if parsed]
 
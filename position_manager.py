@@ -1,37 +1,49 @@
 """Multi-day position tracking and management"""
 import random
+from collections import deque
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+from pymongo import UpdateOne
 from config import get_db
 from models import (
     create_position_doc,
-    create_task_log_doc,
-    create_market_performance_doc
+    create_task_log_doc
 )
-try:
-    from generate_dummy_data import categorize_event
-except ImportError:
-    # Fallback if import fails
-    def categorize_event(event_name):
-        event_lower = event_name.lower()
-        if any(word in event_lower for word in ['election', 'president', 'senate', 'house', 'republican', 'democratic', 'midterm']):
-            return 'Politics'
-        elif any(word in event_lower for word in ['nba', 'nfl', 'super bowl', 'championship', 'world cup', 'warriors', 'lakers', 'chiefs']):
-            return 'Sports'
-        elif any(word in event_lower for word in ['bitcoin', 'ethereum', 'crypto', 'blockchain']):
-            return 'Crypto'
-        elif any(word in event_lower for word in ['fed', 'rate', 'recession', 'inflation', 'unemployment', 's&p', 'gold', 'dollar']):
-            return 'Economic'
-        elif any(word in event_lower for word in ['ai', 'gpt', 'openai', 'tesla', 'apple', 'google', 'amazon', 'spacex', 'quantum']):
-            return 'Tech'
-        return 'Other'
+from categories import categorize_event
+
+
+ACTIVE_STATES = ["watching", "entered"]
+
+# Fields the dashboard reads from a position
+POSITION_PROJECTION = {
+    "position_id": 1,
+    "event_name": 1,
+    "state": 1,
+    "platform_a": 1,
+    "platform_b": 1,
+    "target_profit": 1,
+    "created_at": 1,
+    "last_checked": 1,
+    "expiration_date": 1
+}
+
+# Fields monitor_positions needs to expire a position
+MONITOR_PROJECTION = {"_id": 0, "position_id": 1, "target_profit": 1}
 
 
 class PositionManager:
     """Manages multi-day position tracking"""
     
-    def __init__(self):
+    LOG_FLUSH_THRESHOLD = 100
+    
+    def __init__(self, buffer_logs: bool = False):
         self.db = get_db()
+        # When buffering, task log entries are written in batches by
+        # flush_task_log() instead of one insert per event
+        self.buffer_logs = buffer_logs
+        self._log_buffer = deque()
+        # Time of the first task log entry; it never changes once found
+        self._first_task_ts = None
         self._setup_collections()
     
     def _setup_collections(self):
@@ -46,11 +58,23 @@ class PositionManager:
         except Exception:
             pass
         
+        try:
+            # Active positions by expiry, for monitor_positions
+            self.db.positions.create_index([("state", 1), ("expiration_date", 1)])
+        except Exception:
+            pass
+        
         try:
             self.db.task_log.create_index([("timestamp", -1)])
         except Exception:
             pass
         
+        try:
+            # Serves get_recovery_count
+            self.db.task_log.create_index([("action", 1), ("status", 1)])
+        except Exception:
+            pass
+        
         try:
             # Market type performance uses _id as market_type, which is already unique
             # So we don't need to create another index
@@ -95,48 +119,48 @@ class PositionManager:
     
     def get_active_positions(self) -> List[Dict]:
         """Get all active positions (watching or entered)"""
-        positions = list(self.db.positions.find({
-            "state": {"$in": ["watching", "entered"]}
-        }).sort("created_at", -1))
+        positions = list(self.db.positions.find(
+            {"state": {"$in": ACTIVE_STATES}}, POSITION_PROJECTION
+        ).sort("created_at", -1))
         
+        now = datetime.utcnow()
         for pos in positions:
             pos["_id"] = str(pos["_id"])
-            if isinstance(pos.get("created_at"), datetime):
-                pos["created_at"] = pos["created_at"].isoformat()
-            if isinstance(pos.get("expiration_date"), datetime):
-                pos["expiration_date"] = pos["expiration_date"].isoformat()
+            created = pos.get("created_at")
+            expiration = pos.get("expiration_date")
+            
+            # Day counts come straight from the stored dates, before they
+            # are formatted for the API
+            if isinstance(created, datetime):
+                pos["days_held"] = (now - created).days
+                pos["created_at"] = created.isoformat()
+            if isinstance(expiration, datetime):
+                pos["days_until_expiry"] = max(0, (expiration - now).days)
+                pos["expiration_date"] = expiration.isoformat()
             if isinstance(pos.get("last_checked"), datetime):
                 pos["last_checked"] = pos["last_checked"].isoformat()
-            
-            # Calculate days held
-            if pos.get("created_at"):
-                created = datetime.fromisoformat(pos["created_at"].replace('Z', '+00:00'))
-                days_held = (datetime.utcnow() - created.replace(tzinfo=None)).days
-                pos["days_held"] = days_held
-            
-            # Calculate days until expiry
-            if pos.get("expiration_date"):
-                exp = datetime.fromisoformat(pos["expiration_date"].replace('Z', '+00:00'))
-                days_left = (exp.replace(tzinfo=None) - datetime.utcnow()).days
-                pos["days_until_expiry"] = max(0, days_left)
         
         return positions
     
-    def update_position_state(self, position_id: str, new_state: str, 
-                             actual_profit: Optional[float] = None):
-        """Update position state (watching → entered → expired/profitable/loss)"""
+    @staticmethod
+    def _state_update(new_state: str, actual_profit: Optional[float], now: datetime) -> Dict:
+        """$set fields for moving a position to new_state"""
         update_data = {
             "state": new_state,
-            "last_checked": datetime.utcnow()
+            "last_checked": now
         }
         
         if actual_profit is not None:
             update_data["actual_profit"] = actual_profit
-            update_data["resolved_at"] = datetime.utcnow()
-        
+            update_data["resolved_at"] = now
+        return update_data
+    
+    def update_position_state(self, position_id: str, new_state: str, 
+                             actual_profit: Optional[float] = None):
+        """Update position state (watching → entered → expired/profitable/loss)"""
         self.db.positions.update_one(
             {"position_id": position_id},
-            {"$set": update_data}
+            {"$set": self._state_update(new_state, actual_profit, datetime.utcnow())}
         )
         
         self.log_task("update_position", "success", 
@@ -144,36 +168,38 @@ class PositionManager:
     
     def monitor_positions(self):
         """Monitor all active positions and update states"""
-        active_positions = self.db.positions.find({
-            "state": {"$in": ["watching", "entered"]}
-        })
+        now = datetime.utcnow()
+        active = {"state": {"$in": ACTIVE_STATES}}
         
-        updated = 0
-        for position in active_positions:
+        # Expired markets - simulate resolution
+        # In real system, would check actual market outcome
+        ops = []
+        expired = []
+        for position in self.db.positions.find(
+            {**active, "expiration_date": {"$lte": now}}, MONITOR_PROJECTION
+        ):
             position_id = position["position_id"]
-            
-            # Check if expired
-            expiration_date = position.get("expiration_date")
-            if expiration_date:
-                if isinstance(expiration_date, datetime):
-                    exp_date = expiration_date
-                else:
-                    exp_date = datetime.fromisoformat(str(expiration_date).replace('Z', '+00:00'))
-                
-                if datetime.utcnow() > exp_date.replace(tzinfo=None):
-                    # Market expired - simulate resolution
-                    # In real system, would check actual market outcome
-                    actual_profit = position.get("target_profit", 0) * random.uniform(0.8, 1.2)
-                    self.update_position_state(position_id, "expired", actual_profit)
-                    updated += 1
-                    continue
-            
-            # Update last_checked
-            self.db.positions.update_one(
+            actual_profit = position.get("target_profit", 0) * random.uniform(0.8, 1.2)
+            ops.append(UpdateOne(
                 {"position_id": position_id},
-                {"$set": {"last_checked": datetime.utcnow()}}
-            )
+                {"$set": self._state_update("expired", actual_profit, now)}
+            ))
+            expired.append(position_id)
+        
+        if ops:
+            self.db.positions.bulk_write(ops, ordered=False)
+        
+        # Every other active position was just checked
+        self.db.positions.update_many(
+            {**active, "expiration_date": {"$not": {"$lte": now}}},
+            {"$set": {"last_checked": now}}
+        )
+        
+        for position_id in expired:
+            self.log_task("update_position", "success",
+                         f"Updated position {position_id} to state expired")
         
+        updated = len(expired)
         if updated > 0:
             self.log_task("monitor_positions", "success", f"Updated {updated} expired positions")
         
@@ -195,33 +221,33 @@ class PositionManager:
     
     def calculate_historical_performance(self):
         """Calculate and update market type performance metrics"""
+        # Computed and written entirely server-side; the fields match
+        # models.create_market_performance_doc
         pipeline = [
             {"$group": {
                 "_id": "$market_type",
                 "opportunities_found": {"$sum": 1},
-                "profitable_count": {"$sum": {"$cond": [
+                "profitable_arbs": {"$sum": {"$cond": [
                     {"$gt": ["$target_profit", 0]}, 1, 0
                 ]}},
-                "avg_profit": {"$avg": "$target_profit"}
+                "avg_profit_pct": {"$avg": "$target_profit"}
+            }},
+            {"$addFields": {
+                "market_type": "$_id",
+                # opportunities_found is at least 1 for every group
+                "success_rate": {"$multiply": [
+                    {"$divide": ["$profitable_arbs", "$opportunities_found"]}, 100
+                ]},
+                "last_updated": "$$NOW"
+            }},
+            {"$merge": {
+                "into": "market_type_performance",
+                "on": "_id",
+                "whenMatched": "merge",
+                "whenNotMatched": "insert"
             }}
         ]
-        
-        results = list(self.db.positions.aggregate(pipeline))
-        
-        for result in results:
-            market_type = result["_id"]
-            perf_doc = create_market_performance_doc(
-                market_type=market_type,
-                opportunities_found=result["opportunities_found"],
-                profitable_arbs=result["profitable_count"],
-                avg_profit_pct=result.get("avg_profit", 0)
-            )
-            
-            self.db.market_type_performance.update_one(
-                {"_id": market_type},
-                {"$set": perf_doc},
-                upsert=True
-            )
+        self.db.positions.aggregate(pipeline)
     
     def get_market_performance(self) -> List[Dict]:
         """Get market type performance data"""
@@ -235,13 +261,37 @@ class PositionManager:
     def log_task(self, action: str, status: str, details: str = "", error: Optional[str] = None):
         """Log a task/action for state persistence"""
         log_entry = create_task_log_doc(action, status, details, error)
+        if self.buffer_logs:
+            self._log_buffer.append(log_entry)
+            if len(self._log_buffer) >= self.LOG_FLUSH_THRESHOLD:
+                self.flush_task_log()
+            return
         try:
             self.db.task_log.insert_one(log_entry)
         except Exception as e:
             print(f"⚠️ Failed to log task: {e}")
     
+    def flush_task_log(self):
+        """Write buffered task log entries in a single unordered insert"""
+        # Several threads may flush at once: drain until the deque is empty
+        # rather than sizing the loop from len(), so each entry is popped by
+        # exactly one flush and none are dropped
+        entries = []
+        while True:
+            try:
+                entries.append(self._log_buffer.popleft())
+            except IndexError:
+                break
+        if not entries:
+            return
+        try:
+            self.db.task_log.insert_many(entries, ordered=False)
+        except Exception as e:
+            print(f"⚠️ Failed to log {len(entries)} tasks: {e}")
+    
     def get_recent_tasks(self, limit: int = 50) -> List[Dict]:
         """Get recent task log entries"""
+        self.flush_task_log()
         tasks = list(self.db.task_log.find({}).sort("timestamp", -1).limit(limit))
         for task in tasks:
             task["_id"] = str(task["_id"])
@@ -251,21 +301,26 @@ class PositionManager:
     
     def get_recovery_count(self) -> int:
         """Count recovery events (task_log entries with action='recover')"""
+        self.flush_task_log()
         return self.db.task_log.count_documents({"action": "recover", "status": "success"})
     
     def get_agent_uptime(self) -> Dict:
         """Calculate agent uptime from task log"""
-        first_task = self.db.task_log.find_one({}, sort=[("timestamp", 1)])
-        if not first_task:
-            return {"days": 0, "hours": 0, "positions_tracked": 0}
+        if self._first_task_ts is None:
+            self.flush_task_log()
+            first_task = self.db.task_log.find_one({}, sort=[("timestamp", 1)])
+            if not first_task:
+                return {"days": 0, "hours": 0, "positions_tracked": 0}
+            self._first_task_ts = first_task.get("timestamp")
         
-        start_time = first_task.get("timestamp")
+        start_time = self._first_task_ts
         if isinstance(start_time, datetime):
             uptime = datetime.utcnow() - start_time
         else:
             uptime = timedelta(0)
         
-        total_positions = self.db.positions.count_documents({})
+        # Collection metadata; exact enough for a dashboard counter
+        total_positions = self.db.positions.estimated_document_count()
         
         return {
             "days": uptime.days,
@@ -24,5 +24,5 @@ echo "   Dashboard will be available at: http://localhost:5000"
 echo "   Press Ctrl+C to stop"
 echo ""
 
-python3 app.py
+gunicorn -c gunicorn_conf.py app:app
 
@@ -0,0 +1,533 @@
+let allOpportunities = [];
+let opportunitiesByCategory = {};
+let profitChart = null;
+let strategyChart = null;
+
+function formatCurrency(amount) {
+    return '$' + parseFloat(amount).toFixed(2);
+}
+
+function formatPercent(value) {
+    return parseFloat(value).toFixed(2) + '%';
+}
+
+function formatDate(dateString) {
+    const date = new Date(dateString);
+    return date.toLocaleString();
+}
+
+function getProfitClass(profitPct) {
+    if (profitPct > 2) return 'profit-high';
+    if (profitPct >= 1) return 'profit-medium';
+    return 'profit-low';
+}
+
+function calculateDaysUntilExpiry(expirationDate) {
+    if (!expirationDate) return 'N/A';
+    const exp = new Date(expirationDate);
+    const now = new Date();
+    const diff = Math.ceil((exp - now) / (1000 * 60 * 60 * 24));
+    return diff > 0 ? diff + ' days' : 'Expired';
+}
+
+function checkDbStatus() {
+    fetch('/api/db-status')
+        .then(r => r.json())
+        .then(data => {
+            const indicator = document.getElementById('db-status');
+            const text = document.getElementById('db-status-text');
+            if (data.connected) {
+                indicator.classList.add('connected');
+                text.textContent = 'MongoDB Connected';
+            } else {
+                indicator.classList.remove('connected');
+                text.textContent = 'MongoDB Disconnected';
+            }
+        })
+        .catch(e => {
+            document.getElementById('db-status-text').textContent = 'Status Unknown';
+        });
+}
+
+function groupByCategory(opps) {
+    const groups = {};
+    opps.forEach(o => (groups[o.category] = groups[o.category] || []).push(o));
+    return groups;
+}
+
+function showOpportunities(data) {
+    allOpportunities = data;
+    // Group once per update so category filters are a lookup
+    opportunitiesByCategory = groupByCategory(data);
+    displayOpportunities(data);
+    updateStats(data);
+}
+
+function loadOpportunities() {
+    fetch('/api/opportunities')
+        .then(r => r.json())
+        .then(data => showOpportunities(data))
+        .catch(e => {
+            document.getElementById('opportunities-table').innerHTML =
+                '<div class="no-data">Error loading opportunities</div>';
+        });
+}
+
+// Refresh button: reload every panel, opportunities included
+function refreshDashboard() {
+    loadOpportunities();
+    loadData();
+    checkDbStatus();
+}
+
+function loadData() {
+    // Load recent prices
+    fetch('/api/recent-prices')
+        .then(r => r.json())
+        .then(data => displayPrices(data))
+        .catch(e => {
+            document.getElementById('prices-table').innerHTML =
+                '<div class="no-data">Error loading prices</div>';
+        });
+
+    // Load stats
+    loadStats();
+
+    // Load positions
+    loadPositions();
+
+    // Load task history
+    loadTaskHistory();
+
+    // Load agent status
+    loadAgentStatus();
+
+    // Load strategy evolution
+    loadStrategyEvolution();
+
+    // Load hourly profit chart
+    loadProfitTimeseries();
+
+    document.getElementById('timestamp').textContent =
+        'Last updated: ' + new Date().toLocaleString();
+}
+
+function loadPositions() {
+    fetch('/api/positions')
+        .then(r => r.json())
+        .then(data => displayPositions(data))
+        .catch(e => {
+            document.getElementById('positions-table').innerHTML =
+                '<div class="no-data">Error loading positions</div>';
+        });
+}
+
+function displayPositions(positions) {
+    const container = document.getElementById('positions-table');
+
+    if (!positions || positions.length === 0) {
+        container.innerHTML = '<div class="no-data">No active positions being tracked</div>';
+        return;
+    }
+
+    let html = '<table><thead><tr>';
+    html += '<th>Event</th><th>State</th><th>Platform A</th><th>Platform B</th>';
+    html += '<th>Target Profit</th><th>Days Held</th><th>Days Until Expiry</th>';
+    html += '<th>Created</th></tr></thead><tbody>';
+
+    positions.forEach(pos => {
+        const stateClass = pos.state === 'entered' ? 'profit-high' :
+                          pos.state === 'watching' ? 'profit-medium' : 'profit-low';
+        html += '<tr>';
+        html += '<td>' + (pos.event_name || 'N/A').substring(0, 50) + '</td>';
+        html += '<td><span class="' + stateClass + '">' + (pos.state || 'N/A').toUpperCase() + '</span></td>';
+        html += '<td><span class="badge badge-' + pos.platform_a + '">' + pos.platform_a + '</span></td>';
+        html += '<td><span class="badge badge-' + pos.platform_b + '">' + pos.platform_b + '</span></td>';
+        html += '<td class="profit-high">' + formatCurrency(pos.target_profit || 0) + '</td>';
+        html += '<td>' + (pos.days_held || 0) + ' days</td>';
+        html += '<td>' + (pos.days_until_expiry !== undefined ? pos.days_until_expiry + ' days' : 'N/A') + '</td>';
+        html += '<td>' + formatDate(pos.created_at) + '</td>';
+        html += '</tr>';
+    });
+
+    html += '</tbody></table>';
+    container.innerHTML = html;
+}
+
+function loadTaskHistory() {
+    fetch('/api/task-history')
+        .then(r => r.json())
+        .then(data => displayTaskHistory(data))
+        .catch(e => {
+            document.getElementById('task-history').innerHTML =
+                '<div class="no-data">Error loading task history</div>';
+        });
+}
+
+function displayTaskHistory(tasks) {
+    const container = document.getElementById('task-history');
+
+    if (!tasks || tasks.length === 0) {
+        container.innerHTML = '<div class="no-data">No task history available</div>';
+        return;
+    }
+
+    let html = '<table><thead><tr>';
+    html += '<th>Timestamp</th><th>Action</th><th>Status</th><th>Details</th><th>Error</th></tr></thead><tbody>';
+
+    tasks.slice(0, 20).forEach(task => {
+        const statusClass = task.status === 'success' ? 'profit-high' :
+                           task.status === 'failure' ? 'profit-low' : 'profit-medium';
+        html += '<tr>';
+        html += '<td>' + formatDate(task.timestamp) + '</td>';
+        html += '<td><strong>' + (task.action || 'N/A') + '</strong></td>';
+        html += '<td><span class="' + statusClass + '">' + (task.status || 'N/A').toUpperCase() + '</span></td>';
+        html += '<td>' + (task.details || '').substring(0, 60) + '</td>';
+        html += '<td style="color: #ef4444;">' + (task.error || '-') + '</td>';
+        html += '</tr>';
+    });
+
+    html += '</tbody></table>';
+    container.innerHTML = html;
+}
+
+function loadAgentStatus() {
+    fetch('/api/agent-status')
+        .then(r => r.json())
+        .then(data => {
+            document.getElementById('agent-uptime').textContent =
+                data.days + 'd ' + data.hours + 'h';
+            document.getElementById('positions-tracked').textContent = data.positions_tracked;
+        })
+        .catch(e => console.error('Error loading agent status:', e));
+}
+
+function loadStrategyEvolution() {
+    fetch('/api/strategy-evolution')
+        .then(r => r.json())
+        .then(data => updateStrategyChart(data))
+        .catch(e => console.error('Error loading strategy data:', e));
+}
+
+function updateStrategyChart(performanceData) {
+    const ctx = document.getElementById('strategyChart');
+
+    if (!performanceData || performanceData.length === 0) {
+        if (strategyChart) strategyChart.destroy();
+        return;
+    }
+
+    const labels = performanceData.map(p => p.market_type || 'Unknown');
+    const successRates = performanceData.map(p => p.success_rate || 0);
+    const avgProfits = performanceData.map(p => p.avg_profit_pct || 0);
+
+    if (strategyChart) {
+        strategyChart.destroy();
+    }
+
+    strategyChart = new Chart(ctx, {
+        type: 'bar',
+        data: {
+            labels: labels,
+            datasets: [{
+                label: 'Success Rate %',
+                data: successRates,
+                backgroundColor: 'rgba(74, 222, 128, 0.6)',
+                borderColor: '#4ade80',
+                yAxisID: 'y'
+            }, {
+                label: 'Avg Profit %',
+                data: avgProfits,
+                backgroundColor: 'rgba(96, 165, 250, 0.6)',
+                borderColor: '#60a5fa',
+                yAxisID: 'y1'
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: {
+                    labels: { color: '#cbd5e1' }
+                }
+            },
+            scales: {
+                x: {
+                    ticks: { color: '#94a3b8' },
+                    grid: { color: '#334155' }
+                },
+                y: {
+                    type: 'linear',
+                    display: true,
+                    position: 'left',
+                    ticks: { color: '#94a3b8', callback: function(value) { return value + '%'; } },
+                    grid: { color: '#334155' }
+                },
+                y1: {
+                    type: 'linear',
+                    display: true,
+                    position: 'right',
+                    ticks: { color: '#94a3b8', callback: function(value) { return value + '%'; } },
+                    grid: { drawOnChartArea: false, color: '#334155' }
+                }
+            }
+        }
+    });
+}
+
+function filterOpportunities(filter) {
+    // Update active button
+    document.querySelectorAll('.filter-btn').forEach(btn => {
+        btn.classList.remove('active');
+    });
+    event.target.classList.add('active');
+
+    let filtered = allOpportunities;
+
+    if (filter === 'high') {
+        filtered = allOpportunities.filter(o => o.profit_percentage > 3);
+    } else if (filter === 'expiring') {
+        filtered = allOpportunities.filter(o => {
+            const days = calculateDaysUntilExpiry(o.expiration_date);
+            return days !== 'N/A' && days !== 'Expired' && parseInt(days) < 7;
+        });
+    } else if (filter === 'sports') {
+        filtered = opportunitiesByCategory.Sports || [];
+    } else if (filter === 'politics') {
+        filtered = opportunitiesByCategory.Politics || [];
+    } else if (filter === 'crypto') {
+        filtered = opportunitiesByCategory.Crypto || [];
+    }
+
+    displayOpportunities(filtered);
+}
+
+// Keyed table rendering: rows are kept per key and patched in place, and
+// updates arriving within one frame are coalesced into a single render
+const tableStates = new Map();
+const pendingRenders = new Map();
+let renderScheduled = false;
+
+function renderKeyedTable(container, spec, items) {
+    pendingRenders.set(container, {spec, items});
+    if (!renderScheduled) {
+        renderScheduled = true;
+        requestAnimationFrame(flushRenders);
+    }
+}
+
+function flushRenders() {
+    renderScheduled = false;
+    pendingRenders.forEach(({spec, items}, container) => patchTable(container, spec, items));
+    pendingRenders.clear();
+}
+
+function patchTable(container, spec, items) {
+    if (!items || items.length === 0) {
+        container.innerHTML = '<div class="no-data">' + spec.emptyText + '</div>';
+        tableStates.delete(container);
+        return;
+    }
+
+    let state = tableStates.get(container);
+    if (!state || !container.contains(state.tbody)) {
+        const table = document.getElementById(spec.tableTemplate).content.cloneNode(true);
+        state = {tbody: table.querySelector('tbody'), rows: new Map()};
+        tableStates.set(container, state);
+        container.replaceChildren(table);
+    }
+
+    const rowTemplate = document.getElementById(spec.rowTemplate).content.firstElementChild;
+    const seen = new Set();
+    items.forEach((item, i) => {
+        const key = spec.key(item);
+        let row = state.rows.get(key);
+        if (!row) {
+            row = rowTemplate.cloneNode(true);
+            state.rows.set(key, row);
+        }
+        spec.fill(row, item);
+        seen.add(key);
+        const current = state.tbody.children[i];
+        if (current !== row) {
+            state.tbody.insertBefore(row, current || null);
+        }
+    });
+
+    state.rows.forEach((row, key) => {
+        if (!seen.has(key)) {
+            row.remove();
+            state.rows.delete(key);
+        }
+    });
+}
+
+function field(row, name) {
+    return row.querySelector('[data-field="' + name + '"]');
+}
+
+function setText(el, text) {
+    if (el.textContent !== text) el.textContent = text;
+}
+
+function setClass(el, className) {
+    if (el.className !== className) el.className = className;
+}
+
+function setBadge(badge, platform) {
+    setClass(badge, 'badge badge-' + platform);
+    setText(badge, platform);
+}
+
+const OPPORTUNITY_TABLE = {
+    tableTemplate: 'opportunities-table-template',
+    rowTemplate: 'opportunity-row-template',
+    emptyText: 'No arbitrage opportunities found',
+    key: opp => opp._id,
+    fill: (row, opp) => {
+        const profitPct = opp.profit_percentage || 0;
+        const profitDollars = opp.profit || ((opp.bet_amount_a + opp.bet_amount_b) * profitPct / 100);
+        const profitClass = getProfitClass(profitPct);
+
+        setText(field(row, 'event'), (opp.event_name || 'N/A').substring(0, 50));
+        setBadge(field(row, 'platform-a'), opp.platform_a);
+        setText(field(row, 'price-a'), (opp.platform_a_price * 100).toFixed(2) + '%');
+        setBadge(field(row, 'platform-b'), opp.platform_b);
+        setText(field(row, 'price-b'), (opp.platform_b_price * 100).toFixed(2) + '%');
+        setText(field(row, 'bet-a'), formatCurrency(opp.bet_amount_a));
+        setText(field(row, 'bet-b'), formatCurrency(opp.bet_amount_b));
+        const profit = field(row, 'profit');
+        setClass(profit, profitClass);
+        setText(profit, formatCurrency(profitDollars));
+        const profitPercent = field(row, 'profit-pct');
+        setClass(profitPercent, profitClass);
+        setText(profitPercent, formatPercent(profitPct));
+        setText(field(row, 'expiry'), calculateDaysUntilExpiry(opp.expiration_date));
+        setText(field(row, 'detected'), formatDate(opp.detected_at));
+    }
+};
+
+const PRICE_TABLE = {
+    tableTemplate: 'prices-table-template',
+    rowTemplate: 'price-row-template',
+    emptyText: 'No recent prices available',
+    key: price => price.event_name + '|' + price.platform + '|' + price.outcome,
+    fill: (row, price) => {
+        setText(field(row, 'event'), (price.event_name || 'N/A').substring(0, 50));
+        setBadge(field(row, 'platform'), price.platform);
+        setText(field(row, 'outcome'), (price.outcome || 'N/A').toUpperCase());
+        setText(field(row, 'price'), (price.price * 100).toFixed(2) + '%');
+        setText(field(row, 'timestamp'), formatDate(price.timestamp));
+    }
+};
+
+function displayOpportunities(opps) {
+    renderKeyedTable(document.getElementById('opportunities-table'), OPPORTUNITY_TABLE, opps);
+}
+
+function displayPrices(prices) {
+    renderKeyedTable(document.getElementById('prices-table'), PRICE_TABLE, prices);
+}
+
+function updateStats(opps) {
+    if (opps) {
+        document.getElementById('active-opps').textContent = opps.length;
+    }
+}
+
+function loadStats() {
+    fetch('/api/stats')
+        .then(r => r.json())
+        .then(data => {
+            document.getElementById('active-opps').textContent = data.active_opportunities || 0;
+            document.getElementById('total-24h').textContent = data.total_24h || 0;
+            document.getElementById('avg-profit').textContent = formatPercent(data.avg_profit_percentage || 0);
+            document.getElementById('top-profit').textContent = formatPercent(data.max_profit_percentage || 0);
+            document.getElementById('total-profit').textContent = formatCurrency(data.total_profit_captured || 0);
+            document.getElementById('recovery-events').textContent = data.recovery_events || 0;
+        })
+        .catch(e => console.error('Error loading stats:', e));
+}
+
+function loadProfitTimeseries() {
+    fetch('/api/profit-timeseries')
+        .then(r => r.json())
+        .then(data => updateProfitChart(data))
+        .catch(e => console.error('Error loading profit timeseries:', e));
+}
+
+function updateProfitChart(hours) {
+    const ctx = document.getElementById('profitChart');
+
+    // One point per hour over the last 24 hours; hours without
+    // opportunities are gaps (null)
+    const labels = hours.map(h => new Date(h.hour).getHours() + ':00');
+    const data = hours.map(h => h.avg_profit_percentage);
+
+    if (profitChart) {
+        profitChart.destroy();
+    }
+
+    profitChart = new Chart(ctx, {
+        type: 'line',
+        data: {
+            labels: labels,
+            datasets: [{
+                label: 'Average Profit %',
+                data: data,
+                borderColor: '#4ade80',
+                backgroundColor: 'rgba(74, 222, 128, 0.1)',
+                tension: 0.4,
+                fill: true
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: {
+                    labels: { color: '#cbd5e1' }
+                }
+            },
+            scales: {
+                x: {
+                    ticks: { color: '#94a3b8' },
+                    grid: { color: '#334155' }
+                },
+                y: {
+                    ticks: { color: '#94a3b8', callback: function(value) { return value + '%'; } },
+                    grid: { color: '#334155' }
+                }
+            }
+        }
+    });
+}
+
+// Load data on page load
+loadData();
+checkDbStatus();
+
+// The server pushes opportunities when new ones are detected and the
+// other panels are refreshed alongside. Positions, prices and agent status
+// also change without new opportunities, so they keep a slow timer too
+const PANEL_REFRESH_MS = 60000;
+setInterval(() => {
+    loadData();
+    checkDbStatus();
+}, PANEL_REFRESH_MS);
+
+// A 503 (every stream slot taken) closes the EventSource for good
+// instead of retrying; poll for opportunities from then on
+const OPPORTUNITIES_POLL_MS = 15000;
+const stream = new EventSource('/api/stream');
+stream.onmessage = e => {
+    showOpportunities(JSON.parse(e.data));
+    loadData();
+};
+stream.onerror = () => {
+    checkDbStatus();
+    if (stream.readyState === EventSource.CLOSED) {
+        loadOpportunities();
+        setInterval(loadOpportunities, OPPORTUNITIES_POLL_MS);
+    }
+};
@@ -1,4 +1,5 @@
 """Quick test script to verify setup"""
+import asyncio
 import sys
 from config import get_db, get_client
 from polymarket import PolymarketClient
@@ -7,66 +8,66 @@ from arbitrage import calculate_arbitrage
 
 def test_mongodb():
     """Test MongoDB connection"""
-    print("🔍 Testing MongoDB connection...")
+    lines = ["🔍 Testing MongoDB connection..."]
     try:
         db = get_db()
         # Try a simple query
         count = db.market_prices.count_documents({})
-        print(f"✅ MongoDB connected! Found {count} existing price records")
-        return True
+        lines.append(f"✅ MongoDB connected! Found {count} existing price records")
+        return True, lines
     except Exception as e:
-        print(f"❌ MongoDB connection failed: {e}")
-        return False
+        lines.append(f"❌ MongoDB connection failed: {e}")
+        return False, lines
 
 def test_polymarket():
     """Test Polymarket API"""
-    print("\n🔍 Testing Polymarket API...")
+    lines = ["\n🔍 Testing Polymarket API..."]
     try:
         client = PolymarketClient()
         markets = client.fetch_markets(limit=5)
         if markets:
-            print(f"✅ Polymarket API working! Found {len(markets)} markets")
+            lines.append(f"✅ Polymarket API working! Found {len(markets)} markets")
             # Try parsing one
             parsed = client.parse_market_data(markets[0])
             if parsed:
-                print(f"   Sample market: {parsed['event_name'][:50]}")
-                print(f"   Yes: {parsed['yes_price']:.2%}, No: {parsed['no_price']:.2%}")
-            return True
+                lines.append(f"   Sample market: {parsed['event_name'][:50]}")
+                lines.append(f"   Yes: {parsed['yes_price']:.2%}, No: {parsed['no_price']:.2%}")
+            return True, lines
         else:
-            print("⚠️ Polymarket API returned no markets (may need API key or different endpoint)")
-            return False
+            lines.append("⚠️ Polymarket API returned no markets (may need API key or different endpoint)")
+            return False, lines
     except Exception as e:
-        print(f"❌ Polymarket API error: {e}")
+        lines.append(f"❌ Polymarket API error: {e}")
         import traceback
-        traceback.print_exc()
-        return False
+        lines.append(traceback.format_exc().rstrip())
+        return False, lines
 
 def test_kalshi():
     """Test Kalshi API"""
-    print("\n🔍 Testing Kalshi API...")
+    lines = ["\n🔍 Testing Kalshi API..."]
     try:
         client = KalshiClient()
         markets = client.fetch_markets(limit=5)
         if markets:
-            print(f"✅ Kalshi API working! Found {len(markets)} markets")
+            lines.append(f"✅ Kalshi API working! Found {len(markets)} markets")
             # Try parsing one
             parsed = client.parse_market_data(markets[0])
             if parsed:
-                print(f"   Sample market: {parsed['event_name'][:50]}")
-                print(f"   Yes: {parsed['yes_price']:.2%}, No: {parsed['no_price']:.2%}")
-            return True
+                lines.append(f"   Sample market: {parsed['event_name'][:50]}")
+                lines.append(f"   Yes: {parsed['yes_price']:.2%}, No: {parsed['no_price']:.2%}")
+            return True, lines
         else:
-            print("⚠️ Kalshi API returned no markets (may need API key)")
-            return False
+            lines.append("⚠️ Kalshi API returned no markets (may need API key)")
+            return False, lines
     except Exception as e:
-        print(f"❌ Kalshi API error: {e}")
+        lines.append(f"❌ Kalshi API error: {e}")
         import traceback
-        traceback.print_exc()
-        return False
+        lines.append(traceback.format_exc().rstrip())
+        return False, lines
 
 def test_arbitrage_logic():
     """Test arbitrage calculation"""
-    print("\n🔍 Testing arbitrage calculation...")
+    lines = ["\n🔍 Testing arbitrage calculation..."]
     try:
         # Example: PM Yes @ 0.45, Kalshi No @ 0.52 = 0.97 combined (3% arb)
         result = calculate_arbitrage(
@@ -76,30 +77,44 @@ def test_arbitrage_logic():
             no_price_a=0.55    # PM No
         )
         if result:
-            print(f"✅ Arbitrage calculation working!")
-            print(f"   Profit: {result['profit_percentage']:.2f}%")
-            print(f"   Bet A: ${result['bet_amount_a']:.2f}")
-            print(f"   Bet B: ${result['bet_amount_b']:.2f}")
-            return True
+            lines.append(f"✅ Arbitrage calculation working!")
+            lines.append(f"   Profit: {result['profit_percentage']:.2f}%")
+            lines.append(f"   Bet A: ${result['bet_amount_a']:.2f}")
+            lines.append(f"   Bet B: ${result['bet_amount_b']:.2f}")
+            return True, lines
         else:
-            print("❌ No arbitrage detected (expected for these prices)")
-            return False
+            lines.append("❌ No arbitrage detected (expected for these prices)")
+            return False, lines
     except Exception as e:
-        print(f"❌ Arbitrage calculation error: {e}")
+        lines.append(f"❌ Arbitrage calculation error: {e}")
         import traceback
-        traceback.print_exc()
-        return False
+        lines.append(traceback.format_exc().rstrip())
+        return False, lines
+
+async def _run_probes(probes):
+    """Run the probes concurrently; the API probes spend most of their time waiting"""
+    return await asyncio.gather(*(asyncio.to_thread(test) for _, test in probes))
+
+
+PROBES = [
+    ("MongoDB", test_mongodb),
+    ("Polymarket", test_polymarket),
+    ("Kalshi", test_kalshi),
+    ("Arbitrage Logic", test_arbitrage_logic),
+]
 
 if __name__ == "__main__":
     print("=" * 60)
     print("🧪 Testing Arbitrage Hunter Setup")
     print("=" * 60)
     
+    outcomes = asyncio.run(_run_probes(PROBES))
+    
+    # Print each probe's report in order once all have finished
     results = []
-    results.append(("MongoDB", test_mongodb()))
-    results.append(("Polymarket", test_polymarket()))
-    results.append(("Kalshi", test_kalshi()))
-    results.append(("Arbitrage Logic", test_arbitrage_logic()))
+    for (name, _), (passed, lines) in zip(PROBES, outcomes):
+        print("\n".join(lines))
+        results.append((name, passed))
     
     print("\n" + "=" * 60)
     print("📊 Test Results Summary")